@@ -1,11 +1,7 @@
 """
 script that yields small excerpts from the musdb train subset to benchmark the loading performance
 For the stem dataset, the decoding is the main bottleneck which is why it is quite slow to load
-User can excpect performance of about:
-
-    * stem.mp4: 20 excerpts per second (without multithreading)
-    * wav: 1000 excerpts per second 
-
+Run `musdbbench` to measure the loading performance on your machine.
 
 """
 
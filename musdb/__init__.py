@@ -1,6 +1,12 @@
-from .audio_classes import MultiTrack, Source, Target
+from .audio_classes import MultiTrack, Source, Target, _StemsMemo
+from .index import MetadataIndex
+from .cache import PCMCache, AudioCache
+from .shards import ShardStore, write_shards
+from .stats import LoadStats
+from .loader import Loader
+from .remix import Remixer
+from .writer import EstimatesWriter, write_estimates
 from os import path as op
-import stempeg
 from urllib.request import urlopen, Request
 import collections
 from tqdm import tqdm
@@ -10,6 +16,8 @@ import errno
 import musdb
 import os
 import tempfile
+import time
+import numpy as np
 
 
 class DB(object):
@@ -42,6 +50,40 @@ class DB(object):
         `split='train' loads the training split, `split='valid'` loads the validation
         split. `split=None` applies no splitting.
 
+    index : boolean, optional
+        keep track metadata in an on-disk index (`.musdb_index.json` inside
+        `root`), so that only new or modified files are probed with ffprobe.
+        Defaults to `False`.
+
+    cache_dir : str, optional
+        decode each track once into a `.npy` file inside `cache_dir`. All
+        later reads are slices of a read-only memory map instead of ffmpeg
+        calls. With `sample_rate`, the tracks are resampled once when they
+        are cached. Defaults to `None` (no cache).
+
+    cache_dtype : str, optional
+        data type of the cached audio, `float32` (default) or `int16`.
+
+    stats : boolean, optional
+        record decodes, decoded bytes, decoding and mixing time, cache
+        hits and redundant decodes in `stats`. Defaults to `False`.
+
+    dtype : str, optional
+        data type of the audio, `float64`, `float32` or `int16`. `int16`
+        returns the decoded PCM without conversion at a quarter of the
+        size of `float64`. Defaults to `None` (`float64`).
+
+    memory_cache : int, optional
+        keep decoded excerpts in an in-memory LRU cache of at most
+        `memory_cache` bytes, so that repeated reads of the same excerpt
+        are not decoded again. Defaults to `None` (no cache).
+
+    format : str, optional
+        `shards` reads a packed dataset written by
+        `musdbconvert --format shards` from `root`. All stems are read
+        from memory-mapped shard files, without ffmpeg. Defaults to `None`
+        (stem or wav files, see `is_wav`).
+
     Attributes
     ----------
     setup_file : str
@@ -56,11 +98,26 @@ class DB(object):
         list of names of available sources
     targets_names : list[str]
         list of names of available targets
+    stem_names : list[str]
+        names of the stems ordered by `stem_id`, the mixture first
+    mixing_matrix : np.ndarray
+        [shape=(targets, stems)], gains of the stems in each target,
+        compiled once from the `targets` section of the setup
     setup : Dict
         loaded yaml configuration
     sample_rate : Optional(Float)
         sets sample rate for optional resampling. Defaults to none
         which results in `44100.0`
+    load_timings : OrderedDict
+        seconds spent in each stage of the construction: `setup`, `scan`
+        (directory listing), `metadata` (index lookups and probing),
+        `tracks` (creating the track objects) and `index` (saving the
+        index).
+    stats : LoadStats
+        decoding and mixing counters, `None` if `stats` is not set.
+    audio_cache : AudioCache
+        in-memory cache of decoded excerpts, provides `hits` and `misses`
+        counters. `None` if `memory_cache` is not set.
 
     Methods
     -------
@@ -79,7 +136,16 @@ class DB(object):
         subsets=["train", "test"],
         split=None,
         sample_rate=None,
+        index=False,
+        cache_dir=None,
+        cache_dtype="float32",
+        memory_cache=None,
+        dtype=None,
+        stats=False,
+        format=None,
     ):
+        self.load_timings = collections.OrderedDict()
+        start = time.perf_counter()
         if root is None:
             if download:
                 self.root = os.path.expanduser("~/MUSDB18/MUSDB18-7")
@@ -109,10 +175,50 @@ class DB(object):
                 )
 
         self.sample_rate = sample_rate
+        self.dtype = dtype
         self.sources_names = list(self.setup["sources"].keys())
         self.targets_names = list(self.setup["targets"].keys())
+        stem_ids = self.setup["stem_ids"]
+        self.stem_names = sorted(stem_ids, key=stem_ids.get)
+        self.mixing_matrix = _mixing_matrix(
+            self.setup["targets"], self.stem_names
+        )
         self.is_wav = is_wav
+        self.format = format
+        if index:
+            self.index = MetadataIndex(self.root)
+        else:
+            self.index = None
+        if format == "shards":
+            if cache_dir is not None:
+                raise ValueError("`cache_dir` cannot be used with shards")
+            self.pcm_cache = ShardStore(self.root)
+            if sample_rate not in (None, self.pcm_cache.sample_rate):
+                raise ValueError(
+                    "Shards are stored at %s Hz" % self.pcm_cache.sample_rate
+                )
+        elif format is not None:
+            raise ValueError("Unknown format `%s`" % format)
+        elif cache_dir is not None:
+            self.pcm_cache = PCMCache(
+                cache_dir, dtype=cache_dtype, sample_rate=sample_rate
+            )
+        else:
+            self.pcm_cache = None
+        if memory_cache is not None:
+            self.audio_cache = AudioCache(memory_cache)
+        else:
+            self.audio_cache = None
+        self.stats = LoadStats() if stats else None
+        # last decoded excerpt, shared by all tracks of this DB
+        self._memo = _StemsMemo()
+        self.load_timings["setup"] = time.perf_counter() - start
         self.tracks = self.load_mus_tracks(subsets=subsets, split=split)
+        self._name_index = _name_index(self.tracks)
+        if self.index is not None:
+            start = time.perf_counter()
+            self.index.save()
+            self.load_timings["index"] = time.perf_counter() - start
 
     def __getitem__(self, index):
         return self.tracks[index]
@@ -120,6 +226,58 @@ class DB(object):
     def __len__(self):
         return len(self.tracks)
 
+    def filter(
+        self,
+        subsets=None,
+        names=None,
+        artists=None,
+        min_duration=None,
+        max_duration=None,
+        sources=None,
+        fn=None,
+    ):
+        """Returns a view on the tracks that match all given criteria
+
+        The view shares the ``Track`` objects with this ``DB``, so
+        filtering does not parse the dataset again.
+
+        Parameters
+        ----------
+        subsets : str or list[str], optional
+            keep tracks of the subsets `train` or `test`
+        names : str or list[str], optional
+            keep tracks with the given names
+        artists : str or list[str], optional
+            keep tracks of the given artists
+        min_duration : float, optional
+            keep tracks that are at least `min_duration` seconds long
+        max_duration : float, optional
+            keep tracks that are at most `max_duration` seconds long
+        sources : str or list[str], optional
+            keep tracks where all given sources are available
+        fn : callable, optional
+            keep tracks where `fn(track)` is `True`
+
+        Returns
+        -------
+        DBView
+            view on the matching tracks
+        """
+        return DBView(
+            self,
+            _filter_indices(
+                self.tracks,
+                range(len(self.tracks)),
+                subsets=subsets,
+                names=names,
+                artists=artists,
+                min_duration=min_duration,
+                max_duration=max_duration,
+                sources=sources,
+                fn=fn,
+            ),
+        )
+
     def get_validation_track_indices(self, validation_track_names=None):
         """Returns validation track indices by a given list of track names
 
@@ -160,7 +318,7 @@ class DB(object):
         if isinstance(names, str):
             names = [names]
 
-        return [[t.name for t in self.tracks].index(name) for name in names]
+        return _lookup_names(self._name_index, names)
 
     def load_mus_tracks(self, subsets=None, split=None):
         """Parses the musdb folder structure, returns list of `Track` objects
@@ -190,120 +348,351 @@ class DB(object):
         if subsets != ["train"] and split is not None:
             raise RuntimeError("Subset has to set to `train` when split is used")
 
+        validation_tracks = set(self.setup["validation_tracks"])
+        timings = dict.fromkeys(["scan", "metadata", "tracks"], 0.0)
         tracks = []
         for subset in subsets:
             subset_folder = op.join(self.root, subset)
 
-            for _, folders, files in os.walk(subset_folder):
-                if self.is_wav:
-                    # parse pcm tracks and sort by name
-                    for track_name in sorted(folders):
-                        if subset == "train":
-                            if (
-                                split == "train"
-                                and track_name in self.setup["validation_tracks"]
-                            ):
-                                continue
-                            elif (
-                                split == "valid"
-                                and track_name not in self.setup["validation_tracks"]
-                            ):
-                                continue
-
-                        track_folder = op.join(subset_folder, track_name)
-                        # create new mus track
-                        track = MultiTrack(
-                            name=track_name,
-                            path=op.join(track_folder, self.setup["mixture"]),
-                            subset=subset,
-                            is_wav=self.is_wav,
-                            stem_id=self.setup["stem_ids"]["mixture"],
-                            sample_rate=self.sample_rate,
-                        )
-
-                        # add sources to track
-                        sources = {}
-                        for src, source_file in list(self.setup["sources"].items()):
-                            # create source object
-                            abs_path = op.join(track_folder, source_file)
-                            if os.path.exists(abs_path):
-                                sources[src] = Source(
-                                    track,
-                                    name=src,
-                                    path=abs_path,
-                                    stem_id=self.setup["stem_ids"][src],
-                                    sample_rate=self.sample_rate,
-                                )
-                        track.sources = sources
-                        track.targets = self.create_targets(track)
-
-                        # add track to list of tracks
-                        tracks.append(track)
-                else:
-                    # parse stem files
-                    for track_name in sorted(files):
-                        if not track_name.endswith(".stem.mp4"):
-                            continue
-                        if subset == "train":
-                            if (
-                                split == "train"
-                                and track_name.split(".stem.mp4")[0]
-                                in self.setup["validation_tracks"]
-                            ):
-                                continue
-                            elif (
-                                split == "valid"
-                                and track_name.split(".stem.mp4")[0]
-                                not in self.setup["validation_tracks"]
-                            ):
-                                continue
-
-                        # create new mus track
-                        track = MultiTrack(
-                            name=track_name.split(".stem.mp4")[0],
-                            path=op.join(subset_folder, track_name),
-                            subset=subset,
-                            stem_id=self.setup["stem_ids"]["mixture"],
-                            is_wav=self.is_wav,
-                            sample_rate=self.sample_rate,
-                        )
-                        # add sources to track
-                        sources = {}
-                        for src, source_file in list(self.setup["sources"].items()):
-                            # create source object
-                            abs_path = op.join(subset_folder, track_name)
-                            if os.path.exists(abs_path):
-                                sources[src] = Source(
-                                    track,
-                                    name=src,
-                                    path=abs_path,
-                                    stem_id=self.setup["stem_ids"][src],
-                                    sample_rate=self.sample_rate,
-                                )
-                        track.sources = sources
-
-                        # add targets to track
-                        track.targets = self.create_targets(track)
-                        tracks.append(track)
+            start = time.perf_counter()
+            entries = []
+            if self.format == "shards":
+                # all tracks are listed in the shard index
+                for entry in self.pcm_cache.tracks(subset):
+                    path = self.pcm_cache.shard_path(entry)
+                    entries.append((
+                        entry["name"],
+                        path,
+                        entry,
+                        dict.fromkeys(entry["stems"][1:], path),
+                    ))
+            elif self.is_wav:
+                # parse pcm tracks, one folder per track
+                for folder in _scandir(subset_folder):
+                    if not folder.is_dir():
+                        continue
+                    files = {f.name: f for f in _scandir(folder.path)}
+                    mixture = files.get(self.setup["mixture"])
+                    sources = {
+                        src: files[source_file].path
+                        for src, source_file in self.setup["sources"].items()
+                        if source_file in files
+                    }
+                    entries.append((
+                        folder.name,
+                        op.join(folder.path, self.setup["mixture"]),
+                        mixture,
+                        sources,
+                    ))
+            else:
+                # parse stem files, all sources are streams of the stem file
+                for entry in _scandir(subset_folder):
+                    if not entry.name.endswith(".stem.mp4") or not entry.is_file():
+                        continue
+                    entries.append((
+                        entry.name.split(".stem.mp4")[0],
+                        entry.path,
+                        entry,
+                        dict.fromkeys(self.setup["sources"], entry.path),
+                    ))
+            timings["scan"] += time.perf_counter() - start
+
+            for track_name, track_path, mixture, source_paths in entries:
+                if subset == "train":
+                    if split == "train" and track_name in validation_tracks:
+                        continue
+                    elif split == "valid" and track_name not in validation_tracks:
+                        continue
+
+                start = time.perf_counter()
+                metadata = self._track_metadata(track_path, mixture)
+                timings["metadata"] += time.perf_counter() - start
+
+                start = time.perf_counter()
+                # create new mus track
+                track = MultiTrack(
+                    name=track_name,
+                    path=track_path,
+                    subset=subset,
+                    is_wav=self.is_wav,
+                    stem_id=self.setup["stem_ids"]["mixture"],
+                    sample_rate=self.sample_rate,
+                    metadata=metadata,
+                    pcm_cache=self.pcm_cache,
+                    audio_cache=self.audio_cache,
+                    dtype=self.dtype,
+                    stats=self.stats,
+                    memo=self._memo,
+                )
 
+                # add sources to track
+                sources = {}
+                for src, abs_path in source_paths.items():
+                    # create source object
+                    sources[src] = Source(
+                        track,
+                        name=src,
+                        path=abs_path,
+                        stem_id=self.setup["stem_ids"][src],
+                        sample_rate=self.sample_rate,
+                    )
+                track.sources = sources
+
+                # add targets to track
+                track.targets = self.create_targets(track)
+                tracks.append(track)
+                timings["tracks"] += time.perf_counter() - start
+
+        self.load_timings.update(timings)
         return tracks
 
+    def _track_metadata(self, path, entry=None):
+        # metadata from the index, `None` lets the track probe the file
+        if self.format == "shards":
+            return self.pcm_cache.metadata(entry)
+        if self.index is None or entry is None:
+            return None
+        return self.index.metadata(
+            path, self.setup["stem_ids"]["mixture"], stat=entry.stat()
+        )
+
+    def sample_excerpts(
+        self,
+        duration,
+        n=None,
+        targets=None,
+        seed=None,
+        weighted=True,
+        dtype=None,
+        silence_threshold=None,
+        hop=0.1,
+    ):
+        """Yields random excerpts of random tracks
+
+        Excerpts are read without changing `chunk_start` and
+        `chunk_duration` of the tracks. All stems of an excerpt are
+        decoded at once (or read from the `cache_dir` cache).
+
+        Parameters
+        ----------
+        duration : float
+            excerpt duration in seconds
+        n : int, optional
+            number of excerpts, defaults to `None` (infinite)
+        targets : list[str], optional
+            names of the returned targets, defaults to all targets
+        seed : int, optional
+            seed of the random generator
+        weighted : boolean, optional
+            draw tracks proportionally to their duration, so that every
+            excerpt of the dataset is equally likely. Defaults to `True`.
+        dtype : np.dtype, optional
+            data type of the mixture and targets, e.g. `float32` to halve
+            the memory usage. Defaults to the `dtype` of the DB.
+        silence_threshold : float, optional
+            only draw excerpts where the mean power of each of the
+            `targets` is above `silence_threshold` dBFS. Activity is
+            decided from the RMS envelopes of the tracks (see
+            ``load_envelopes``), without decoding. Excerpts start at
+            multiples of `hop`. Defaults to `None` (no activity check).
+        hop : float, optional
+            frame length of the envelopes in seconds, defaults to `0.1`
+
+        Yields
+        ------
+        mixture : array_like
+            [shape=(num_samples, num_channels)]
+        targets : array_like
+            [shape=(targets, num_samples, num_channels)]
+        """
+        if targets is None:
+            targets = self.targets_names
+        if dtype is None:
+            dtype = self.dtype
+
+        tracks = [track for track in self.tracks if track.duration >= duration]
+        if not tracks:
+            raise ValueError("No track is longer than %.2fs" % duration)
+
+        if silence_threshold is not None:
+            self.load_envelopes(hop)
+            active = [
+                (track, _active_frames(
+                    track, targets, duration, hop, silence_threshold
+                ))
+                for track in tracks
+            ]
+            active = [(track, frames) for track, frames in active if len(frames)]
+            if not active:
+                raise ValueError("No excerpt of the targets is active")
+            tracks = [track for track, _ in active]
+            starts = [frames for _, frames in active]
+            weights = [len(frames) for frames in starts]
+        else:
+            weights = [track.duration for track in tracks]
+
+        if weighted:
+            p = np.array(weights, dtype=np.float64)
+            p /= p.sum()
+        else:
+            p = None
+
+        rng = np.random.RandomState(seed)
+        k = 0
+        while n is None or k < n:
+            i = rng.choice(len(tracks), p=p)
+            track = tracks[i]
+            if silence_threshold is not None:
+                start = min(
+                    starts[i][rng.randint(len(starts[i]))] * hop,
+                    track.duration - duration,
+                )
+            else:
+                start = rng.uniform(0, track.duration - duration)
+            stems = track.load_stems(start, duration, self.sample_rate, dtype)
+            mixture = stems[track.stem_index(track.stem_id)]
+            if track.pcm_cache is None:
+                # do not hand out the shared decoded excerpt
+                mixture = mixture.copy()
+            yield mixture, track.mix_targets(stems, targets, dtype=dtype)
+            k += 1
+
+    def get_batch(self, requests, targets=None, dtype=None, out=None):
+        """Reads a batch of excerpts into one array
+
+        Requests are grouped by track, and excerpts of a track that overlap
+        or are less than one excerpt duration apart are decoded together, so
+        that they share one decode. Distant excerpts are decoded separately.
+        The excerpts are copied into a single preallocated array.
+
+        Parameters
+        ----------
+        requests : list[tuple(int, float, float)]
+            `(track_idx, start, duration)` of each excerpt in seconds. All
+            excerpts need the same number of samples.
+        targets : list[str], optional
+            names of the returned targets, defaults to `None` (all stems)
+        dtype : np.dtype, optional
+            data type of the batch, defaults to the `dtype` of the DB
+            (`float64` if not set).
+        out : np.ndarray, optional
+            array the batch is written to, e.g. to reuse the array of the
+            previous batch. Defaults to `None` (a new array).
+
+        Returns
+        -------
+        np.ndarray
+            [shape=(batch, stems, num_samples, num_channels)], stems are
+            ordered by `stem_id`. With `targets`,
+            [shape=(batch, 1 + targets, num_samples, num_channels)] with the
+            mixture first. Excerpts that exceed the track are zero-padded.
+        """
+        if dtype is None:
+            dtype = self.dtype
+        requests = list(requests)
+        if not requests:
+            raise ValueError("`requests` is empty")
+
+        tracks = self.tracks
+        groups = collections.OrderedDict()
+        nb_samples = None
+        for b, (track_idx, start, duration) in enumerate(requests):
+            track = tracks[track_idx]
+            samples = int(round(duration * (self.sample_rate or track.rate)))
+            if nb_samples is None:
+                nb_samples = samples
+            elif samples != nb_samples:
+                raise ValueError(
+                    "All excerpts of a batch need the same number of samples"
+                )
+            groups.setdefault(track_idx, []).append((b, start, duration))
+
+        first = tracks[requests[0][0]]
+        if targets is None:
+            nb_stems = 1 + len(first.sources)
+        else:
+            nb_stems = 1 + len(targets)
+        shape = (len(requests), nb_stems, nb_samples, first.channels)
+        if out is None:
+            out = np.empty(shape, dtype=dtype or np.float64)
+        elif out.shape != shape:
+            raise ValueError("`out` has shape %s, expected %s" % (out.shape, shape))
+
+        spans = (
+            (track_idx, span)
+            for track_idx, excerpts in groups.items()
+            for span in _merge_excerpts(excerpts)
+        )
+        for track_idx, excerpts in spans:
+            track = tracks[track_idx]
+            rate = self.sample_rate or track.rate
+            span_start = excerpts[0][1]
+            span_stop = max(start + duration for _, start, duration in excerpts)
+            stems = track.load_stems(
+                span_start, span_stop - span_start, self.sample_rate, dtype
+            )
+            for b, start, _ in excerpts:
+                offset = int(round((start - span_start) * rate))
+                excerpt = stems[:, offset:offset + nb_samples]
+                n = excerpt.shape[1]
+                if targets is None:
+                    out[b, :, :n] = excerpt
+                else:
+                    out[b, 0, :n] = excerpt[track.stem_index(track.stem_id)]
+                    out[b, 1:, :n] = track.mix_targets(excerpt, targets, dtype)
+                out[b, :, n:] = 0
+        return out
+
+    def load_envelopes(self, hop=0.1):
+        """Loads the RMS envelopes of all tracks into `track.envelopes`
+
+        Envelopes are computed once per track by decoding the whole track.
+        With `index=True`, they are saved next to the metadata index and
+        loaded from there afterwards.
+
+        Parameters
+        ----------
+        hop : float
+            frame length of the envelopes in seconds, defaults to `0.1`
+        """
+        for track in self.tracks:
+            if hop in track.envelopes:
+                continue
+            envelope = None
+            if self.index is not None:
+                envelope = self.index.envelope(track.path, hop)
+            if envelope is not None:
+                track.envelopes[hop] = envelope
+            else:
+                envelope = track.envelope(hop)
+                if self.index is not None:
+                    self.index.set_envelope(track.path, hop, envelope)
+        if self.index is not None:
+            self.index.save()
+
     def create_targets(self, track):
-        # add targets to track
+        # stems of this track, ordered by `stem_id` like its stems tensor
+        names = [self.stem_names[0]] + sorted(
+            track.sources, key=lambda name: track.sources[name].stem_id
+        )
+        matrix = self.mixing_matrix[
+            :, [self.stem_names.index(name) for name in names]
+        ]
+
+        # add targets with at least one source to track
         targets = collections.OrderedDict()
-        for name, target_srcs in list(self.setup["targets"].items()):
-            # add a list of target sources
-            target_sources = []
-            for source, gain in list(target_srcs.items()):
-                if source in list(track.sources.keys()):
-                    # add gain to source tracks
-                    track.sources[source].gain = float(gain)
-                    # add tracks to components
-                    target_sources.append(track.sources[source])
-                    # add sources to target
-            if target_sources:
-                targets[name] = Target(track, sources=target_sources, name=name)
-
+        rows = []
+        for i, name in enumerate(self.targets_names):
+            columns = np.flatnonzero(matrix[i, 1:]) + 1
+            if len(columns):
+                targets[name] = Target(
+                    track,
+                    sources=[track.sources[names[c]] for c in columns],
+                    name=name,
+                    gains=matrix[i, columns].tolist(),
+                )
+                rows.append(i)
+        track.mixing_matrix = matrix[rows]
         return targets
 
     def save_estimates(self, user_estimates, track, estimates_dir, write_stems=False):
@@ -317,21 +706,16 @@ class DB(object):
             musdb track object
         estimates_dir : str,
             output folder name where to save the estimates.
+        write_stems : boolean, optional
+            write all estimates into a single multi-stream file
+            `estimates_dir/subset/name.stem.mp4` with one ffmpeg call,
+            instead of one wav file per target. Defaults to `False`.
+
+        See Also
+        --------
+        EstimatesWriter : writes estimates in background workers
         """
-        track_estimate_dir = op.join(estimates_dir, track.subset, track.name)
-        if not os.path.exists(track_estimate_dir):
-            os.makedirs(track_estimate_dir)
-
-        # write out tracks to disk
-        if write_stems:
-            pass
-            # to be implemented
-        else:
-            for target, estimate in list(user_estimates.items()):
-                target_path = op.join(track_estimate_dir, target + ".wav")
-                stempeg.write_audio(
-                    path=target_path, data=estimate, sample_rate=track.rate
-                )
+        write_estimates(user_estimates, track, estimates_dir, write_stems)
 
     def _check_exists(self):
         return os.path.exists(os.path.join(self.root, "train"))
@@ -390,3 +774,189 @@ class DB(object):
             f.close()
             if os.path.exists(f.name):
                 os.remove(f.name)
+
+
+class DBView(object):
+    """
+    Lightweight view on a subset of the tracks of a ``DB``
+
+    Views are returned by ``DB.filter`` and share the ``Track`` objects
+    with their ``DB``. They can be iterated, indexed and filtered again
+    like a ``DB``, all other attributes are forwarded to the ``DB``.
+
+    Attributes
+    ----------
+    db : DB
+        the underlying ``DB`` object
+    indices : list[int]
+        indices of the selected tracks in `db.tracks`
+    """
+
+    def __init__(self, db, indices):
+        self.db = db
+        self.indices = list(indices)
+        self._name_index = _name_index(self.tracks)
+
+    @property
+    def tracks(self):
+        """list[Track]: selected tracks"""
+        return [self.db.tracks[i] for i in self.indices]
+
+    def __getattr__(self, name):
+        # dataset attributes and methods, e.g. `setup`, `root` or
+        # `save_estimates`, are those of the underlying ``DB``
+        if name == "db":
+            raise AttributeError(name)
+        return getattr(self.db, name)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return DBView(self.db, self.indices[index])
+        return self.db.tracks[self.indices[index]]
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __iter__(self):
+        for i in self.indices:
+            yield self.db.tracks[i]
+
+    def __repr__(self):
+        return "DBView(%d tracks)" % len(self)
+
+    def get_track_indices_by_names(self, names):
+        """Returns the positions of tracks in this view by track name"""
+        if isinstance(names, str):
+            names = [names]
+
+        return _lookup_names(self._name_index, names)
+
+    def filter(self, **criteria):
+        """Filters this view further, see ``DB.filter``"""
+        return DBView(
+            self.db, _filter_indices(self.db.tracks, self.indices, **criteria)
+        )
+
+    sample_excerpts = DB.sample_excerpts
+    get_batch = DB.get_batch
+    load_envelopes = DB.load_envelopes
+
+
+def _scandir(folder):
+    # one level directory listing sorted by name, the `DirEntry` objects
+    # keep the file type, so that no additional stat call is needed
+    try:
+        with os.scandir(folder) as it:
+            return sorted(it, key=lambda entry: entry.name)
+    except FileNotFoundError:
+        return []
+
+
+def _active_frames(track, targets, duration, hop, threshold):
+    # start frames of the excerpts where all targets are active
+    envelope = track.envelopes[hop].astype(np.float64)
+    length = int(np.ceil(round(duration / hop, 6)))
+    nb_starts = envelope.shape[1] - length + 1
+    if nb_starts <= 0:
+        return np.array([], dtype=int)
+    active = np.ones(nb_starts, dtype=bool)
+    for name in targets:
+        target = track.targets.get(name)
+        if target is None:
+            return np.array([], dtype=int)
+        # a target is as loud as its loudest source
+        power = np.max(
+            [
+                (gain * envelope[track.stem_index(source.stem_id)]) ** 2
+                for source, gain in zip(target.sources, target.gains)
+            ],
+            axis=0,
+        )
+        # mean power of all excerpts of `length` frames
+        cumsum = np.concatenate([[0.0], np.cumsum(power)])
+        mean_power = (cumsum[length:] - cumsum[:-length]) / length
+        active &= mean_power >= 10 ** (threshold / 10.0)
+    return np.flatnonzero(active)
+
+
+def _mixing_matrix(targets, stem_names):
+    # (targets, stems) gains of the `targets` section of the setup,
+    # sources without a stem are skipped
+    matrix = np.zeros((len(targets), len(stem_names)))
+    for i, target_sources in enumerate(targets.values()):
+        for source, gain in target_sources.items():
+            if source in stem_names:
+                matrix[i, stem_names.index(source)] = float(gain)
+    return matrix
+
+
+def _merge_excerpts(excerpts):
+    # splits the `(b, start, duration)` excerpts of a track into spans of
+    # overlapping or close excerpts, each sorted by start
+    spans = []
+    stop = None
+    for excerpt in sorted(excerpts, key=lambda excerpt: excerpt[1]):
+        _, start, duration = excerpt
+        if stop is not None and start - stop < duration:
+            spans[-1].append(excerpt)
+            stop = max(stop, start + duration)
+        else:
+            spans.append([excerpt])
+            stop = start + duration
+    return spans
+
+
+def _name_index(tracks):
+    return {track.name: i for i, track in enumerate(tracks)}
+
+
+def _lookup_names(name_index, names):
+    try:
+        return [name_index[name] for name in names]
+    except KeyError as e:
+        raise ValueError("Track %s not found" % e.args[0]) from None
+
+
+def _filter_indices(
+    tracks,
+    indices,
+    subsets=None,
+    names=None,
+    artists=None,
+    min_duration=None,
+    max_duration=None,
+    sources=None,
+    fn=None,
+):
+    def as_set(values):
+        if values is None:
+            return None
+        if isinstance(values, str):
+            values = [values]
+        return set(values)
+
+    subsets = as_set(subsets)
+    names = as_set(names)
+    artists = as_set(artists)
+    sources = as_set(sources)
+
+    selected = []
+    for i in indices:
+        track = tracks[i]
+        if subsets is not None and track.subset not in subsets:
+            continue
+        if names is not None and track.name not in names:
+            continue
+        if artists is not None and track.artist not in artists:
+            continue
+        if sources is not None and not sources <= set(track.sources):
+            continue
+        # duration is probed last, since it might require ffprobe
+        if min_duration is not None and track.duration < min_duration:
+            continue
+        if max_duration is not None and track.duration > max_duration:
+            continue
+        if fn is not None and not fn(track):
+            continue
+        selected.append(i)
+    return selected
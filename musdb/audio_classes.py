@@ -1,6 +1,113 @@
+import collections
 import os
+import time
 import numpy as np
 import stempeg
+from .decode import iter_streams, read_streams, to_dtype
+
+
+class _StemsMemo(object):
+    """Holds the most recently decoded stems excerpt of a ``DB``
+
+    Decoding is keyed by
+    ``(streams, chunk_start, chunk_duration, sample_rate, dtype)``
+    so that all sources and targets of the same excerpt share one decode.
+    Only one excerpt is kept to bound memory usage when iterating over the
+    whole dataset. The memo is shared by the tracks of one ``DB`` and is
+    empty when unpickled.
+    """
+
+    def __init__(self):
+        self._entry = None
+
+    def __getstate__(self):
+        return {}
+
+    def __setstate__(self, state):
+        self.__init__()
+
+    def get(self, key):
+        entry = self._entry
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        return None
+
+    def put(self, key, stems):
+        stems.flags.writeable = False
+        self._entry = (key, stems)
+
+    def clear(self):
+        self._entry = None
+
+
+def mix_sources(audios, gains, dtype=None):
+    """Linearly mixes audio signals into one preallocated buffer
+
+    Parameters
+    ----------
+    audios : iterable of array_like
+        signals of the same shape [shape=(num_samples, num_channels)]
+    gains : iterable of float
+        mixing weight of each signal
+    dtype : np.dtype, optional
+        output data type, defaults to ``None`` (data type of the
+        inputs for float inputs, `float64` otherwise). `int16` signals
+        are mixed in `float32` and converted back to `int16`.
+
+    Returns
+    -------
+    array_like
+        [shape=(num_samples, num_channels)]
+    """
+    out_dtype = dtype
+    out = None
+    buffer = None
+    for audio, gain in zip(audios, gains):
+        if audio.dtype == np.int16:
+            # mix integer PCM in float scale
+            gain = gain / (np.iinfo(np.int16).max + 1.0)
+        if out is None:
+            if dtype is None:
+                dtype = audio.dtype if audio.dtype.kind == "f" else np.float64
+            elif np.dtype(dtype).kind != "f":
+                dtype = np.float32
+            out = np.multiply(audio, gain, dtype=dtype)
+        elif gain == 1.0:
+            np.add(out, audio, out=out, casting="same_kind")
+        else:
+            if buffer is None:
+                buffer = np.empty_like(out)
+            np.multiply(audio, gain, out=buffer, casting="same_kind")
+            out += buffer
+    return to_dtype(out, out_dtype)
+
+
+def rms_envelope(stems, rate, hop=0.1):
+    """Computes the RMS envelope of each stem
+
+    Parameters
+    ----------
+    stems : array_like
+        [shape=(stems, num_samples, num_channels)]
+    rate : float
+        sample rate of the stems
+    hop : float
+        frame length in seconds, defaults to `0.1`. A last incomplete
+        frame is dropped.
+
+    Returns
+    -------
+    np.ndarray
+        [shape=(stems, num_samples // (hop * rate))], `float32` RMS of each
+        frame over all channels, in full scale
+    """
+    nb_stems, samples, channels = stems.shape
+    frame = max(int(round(hop * rate)), 1)
+    frames = samples // frame
+    x = to_dtype(stems[:, :frames * frame], np.float32).reshape(
+        nb_stems, frames, frame * channels
+    )
+    return np.sqrt(np.einsum("sfn,sfn->sf", x, x) / (frame * channels))
 
 
 class Track(object):
@@ -27,6 +134,26 @@ class Track(object):
         sets offset when loading the audio, defaults to 0 (beginning).
     chunk_duration : float
         sets duration for the audio, defaults to ``None`` (end).
+    metadata : Dict, optional
+        precomputed ``samples``, ``rate``, ``duration`` and ``channels``
+        of the track, e.g. from a ``MetadataIndex``. Skips probing the file.
+    audio_cache : AudioCache, optional
+        in-memory cache of decoded excerpts, defaults to ``None``.
+    dtype : np.dtype, optional
+        data type of the audio, `float64`, `float32` or `int16`.
+        Defaults to ``None`` (`float64`).
+    stats : LoadStats, optional
+        records decodes, mixing and cache hits, defaults to ``None``.
+    info : stempeg.Info
+        ffprobe metadata, probed on first access.
+    samples : int
+        number of samples, probed on first access.
+    duration : float
+        duration in seconds, probed on first access.
+    rate : float
+        sample rate of the file, probed on first access.
+    channels : int
+        number of channels, probed on first access.
     """
 
     def __init__(
@@ -37,7 +164,11 @@ class Track(object):
         subset=None,
         chunk_start=0,
         chunk_duration=None,
-        sample_rate=None
+        sample_rate=None,
+        metadata=None,
+        audio_cache=None,
+        dtype=None,
+        stats=None
     ):
         self.path = path
         self.subset = subset
@@ -46,25 +177,88 @@ class Track(object):
         self.chunk_start = chunk_start
         self.chunk_duration = chunk_duration
         self.sample_rate = sample_rate
+        self.audio_cache = audio_cache
+        self.dtype = dtype
+        self.stats = stats
 
-        # load and store metadata
-        if os.path.exists(self.path):
-            self.info = stempeg.Info(self.path)
-            self.samples = int(self.info.samples(self.stem_id))
-            self.duration = self.info.duration(self.stem_id)
-            self.rate = self.info.rate(self.stem_id)
-        else:
-            # set to `None` if no path was set (fake file)
-            self.info = None
-            self.samples = None
-            self.duration = None
-            self.rate = None
+        # metadata is probed lazily on first access
+        self._info = None
+        self._metadata = dict(metadata) if metadata is not None else None
 
         self._audio = None
 
     def __len__(self):
         return self.samples
 
+    @property
+    def info(self):
+        """stempeg.Info: ffprobe metadata of the file"""
+        if self._info is None and os.path.exists(self.path):
+            self._info = stempeg.Info(self.path)
+        return self._info
+
+    @info.setter
+    def info(self, info):
+        self._info = info
+        self._metadata = None
+
+    def _get_metadata(self, key):
+        if self._metadata is None:
+            info = self.info
+            if info is not None:
+                self._metadata = {
+                    "samples": int(info.samples(self.stem_id)),
+                    "duration": info.duration(self.stem_id),
+                    "rate": info.rate(self.stem_id),
+                    "channels": info.channels(self.stem_id),
+                }
+            else:
+                # set to `None` if no path was set (fake file)
+                self._metadata = dict.fromkeys(
+                    ["samples", "duration", "rate", "channels"]
+                )
+        return self._metadata[key]
+
+    def _set_metadata(self, key, value):
+        self._get_metadata(key)
+        self._metadata[key] = value
+
+    @property
+    def samples(self):
+        """int: number of samples"""
+        return self._get_metadata("samples")
+
+    @samples.setter
+    def samples(self, value):
+        self._set_metadata("samples", value)
+
+    @property
+    def duration(self):
+        """float: duration in seconds"""
+        return self._get_metadata("duration")
+
+    @duration.setter
+    def duration(self, value):
+        self._set_metadata("duration", value)
+
+    @property
+    def rate(self):
+        """float: sample rate of the file"""
+        return self._get_metadata("rate")
+
+    @rate.setter
+    def rate(self, value):
+        self._set_metadata("rate", value)
+
+    @property
+    def channels(self):
+        """int: number of channels"""
+        return self._get_metadata("channels")
+
+    @channels.setter
+    def channels(self, value):
+        self._set_metadata("channels", value)
+
     @property
     def audio(self):
         # return cached audio if explicitly set by setter
@@ -72,41 +266,90 @@ class Track(object):
             return self._audio
         # read from disk to save RAM otherwise
         else:
-            return self.load_audio(
-                self.path,
-                self.stem_id,
-                self.chunk_start,
-                self.chunk_duration,
-                self.sample_rate
+            return self.read(
+                self.chunk_start, self.chunk_duration, self.sample_rate
             )
 
     @audio.setter
     def audio(self, array):
         self._audio = array
 
+    def read(self, start=0, duration=None, sample_rate=None, dtype=None):
+        """Reads an excerpt of the audio from disk
+
+        Unlike ``audio``, ``read`` does not depend on `chunk_start` and
+        `chunk_duration`, so that several excerpts of the same track can
+        be read concurrently, e.g. from a thread pool.
+
+        Parameters
+        ----------
+        start : float
+            offset in seconds, defaults to 0 (beginning).
+        duration : float, optional
+            duration in seconds, defaults to ``None`` (end).
+        sample_rate : float, optional
+            output sample rate, defaults to the `sample_rate` of the track.
+        dtype : np.dtype, optional
+            output data type, defaults to the `dtype` of the track.
+            `int16` returns the decoded PCM without conversion.
+
+        Returns
+        -------
+        array_like
+            [shape=(num_samples, num_channels)]
+        """
+        if sample_rate is None:
+            sample_rate = self.sample_rate
+        if dtype is None:
+            dtype = self.dtype
+        return self.load_audio(
+            self.path, self.stem_id, start, duration, sample_rate, dtype
+        )
+
     def load_audio(
         self,
         path,
         stem_id,
         chunk_start=0,
         chunk_duration=None,
-        sample_rate=None
+        sample_rate=None,
+        dtype=None
     ):
         """array_like: [shape=(num_samples, num_channels)]
         """
+        if self.audio_cache is not None:
+            key = (
+                path, stem_id, chunk_start, chunk_duration, sample_rate, dtype
+            )
+            audio = self.audio_cache.get(key)
+            if audio is not None:
+                if self.stats is not None:
+                    self.stats.hit("memory")
+                # do not hand out the shared cached array
+                return audio.copy()
         if os.path.exists(self.path):
             if self.is_wav:
                 stem_id = 0
-            audio, rate = stempeg.read_stems(
-                filename=path,
-                stem_id=stem_id,
+            start = time.perf_counter()
+            # `read_streams` does not probe the file, the channels are
+            # known from the metadata
+            audio = read_streams(
+                [(path, stem_id)],
+                channels=self.channels,
                 start=chunk_start,
                 duration=chunk_duration,
-                info=self.info,
                 sample_rate=sample_rate,
-                ffmpeg_format="s16le"
-            )
-            self._rate = rate
+                dtype=dtype or np.float64,
+            )[0]
+            if self.stats is not None:
+                self.stats.decode(
+                    getattr(self, "name", None) or self.path,
+                    audio,
+                    time.perf_counter() - start,
+                    (path, stem_id, chunk_start, chunk_duration, sample_rate, dtype)
+                )
+            if self.audio_cache is not None:
+                self.audio_cache.put(key, audio.copy())
             return audio
         else:
             self._rate = None
@@ -117,7 +360,144 @@ class Track(object):
         return "%s" % (self.path)
 
 
+class _TrackRecord(object):
+    """Compact picklable state of a ``MultiTrack``
+
+    Sources and targets are stored as plain tuples and rebuilt when the
+    record is unpickled, ffprobe info objects are not stored.
+    """
+
+    __slots__ = (
+        "name", "path", "artist", "title", "subset", "is_wav", "stem_id",
+        "sample_rate", "dtype", "chunk_start", "chunk_duration", "metadata",
+        "pcm_cache", "audio_cache", "stats", "memo", "audio", "stems",
+        "sources", "targets",
+    )
+
+    def __init__(self, track):
+        self.name = track.name
+        self.path = track.path
+        self.artist = track.artist
+        self.title = track.title
+        self.subset = track.subset
+        self.is_wav = track.is_wav
+        self.stem_id = track.stem_id
+        self.sample_rate = track.sample_rate
+        self.dtype = track.dtype
+        self.chunk_start = track.chunk_start
+        self.chunk_duration = track.chunk_duration
+        self.metadata = track._metadata
+        self.pcm_cache = track.pcm_cache
+        self.audio_cache = track.audio_cache
+        self.stats = track.stats
+        self.memo = track.memo
+        self.audio = track._audio
+        self.stems = track._stems
+        # source paths equal to the track path (stem files) are not repeated
+        self.sources = tuple(
+            (
+                source.name,
+                None if source.path == track.path else source.path,
+                source.stem_id,
+                source.gain,
+                source._audio,
+            )
+            for source in (track.sources or {}).values()
+        )
+        self.targets = tuple(
+            (
+                name,
+                tuple(source.name for source in target.sources),
+                tuple(target.gains),
+            )
+            for name, target in (track.targets or {}).items()
+        )
+
+    def __getstate__(self):
+        return tuple(getattr(self, key) for key in self.__slots__)
+
+    def __setstate__(self, state):
+        for key, value in zip(self.__slots__, state):
+            setattr(self, key, value)
+
+    def rebuild(self):
+        """Returns the ``MultiTrack`` with its sources and targets"""
+        track = MultiTrack(
+            path=self.path,
+            name=self.name,
+            artist=self.artist,
+            title=self.title,
+            subset=self.subset,
+            is_wav=self.is_wav,
+            stem_id=self.stem_id,
+            sample_rate=self.sample_rate,
+            dtype=self.dtype,
+            chunk_start=self.chunk_start,
+            chunk_duration=self.chunk_duration,
+            metadata=self.metadata,
+            pcm_cache=self.pcm_cache,
+            audio_cache=self.audio_cache,
+            stats=self.stats,
+            memo=self.memo,
+        )
+        track._audio = self.audio
+        track._stems = self.stems
+
+        sources = {}
+        for name, path, stem_id, gain, audio in self.sources:
+            source = Source(
+                track,
+                name=name,
+                path=self.path if path is None else path,
+                stem_id=stem_id,
+                gain=gain,
+            )
+            source._audio = audio
+            sources[name] = source
+        track.sources = sources
+        track.targets = collections.OrderedDict(
+            (
+                name,
+                Target(
+                    track,
+                    [sources[s] for s in source_names],
+                    name=name,
+                    gains=gains,
+                ),
+            )
+            for name, source_names, gains in self.targets
+        )
+        if track.targets:
+            # rebuilt from the target gains, so that it is not pickled
+            matrix = np.zeros((len(track.targets), 1 + len(sources)))
+            for i, target in enumerate(track.targets.values()):
+                for source, gain in zip(target.sources, target.gains):
+                    matrix[i, track.stem_index(source.stem_id)] = gain
+            track.mixing_matrix = matrix
+        return track
+
+
+def _rebuild_track(record):
+    return record.rebuild()
+
+
 class MultiTrack(Track):
+    """
+    A musdb track with its sources and targets
+
+    Tracks are pickled as a compact record of their paths, metadata and
+    mixing setup, e.g. when they are sent to ``DataLoader`` worker
+    processes. The ``Source`` and ``Target`` objects are rebuilt on
+    unpickling.
+
+    Attributes
+    ----------
+    mixing_matrix : np.ndarray
+        [shape=(targets, stems)], gains of the stems in each target, in the
+        order of `targets` and `stem_id`. Set by ``DB.create_targets``,
+        `None` mixes each target separately.
+    """
+
     def __init__(
         self,
         path=None,
@@ -127,6 +507,8 @@ class MultiTrack(Track):
         sources=None,
         targets=None,
         sample_rate=None,
+        pcm_cache=None,
+        memo=None,
         *args,
         **kwargs
     ):
@@ -145,8 +527,30 @@ class MultiTrack(Track):
         self.sources = sources
         self.targets = targets
         self.sample_rate = sample_rate
+        self.pcm_cache = pcm_cache
+        # excerpt shared by all sources and targets, shared with the ``DB``
+        self.memo = memo if memo is not None else _StemsMemo()
+        self.envelopes = {}
+        self.mixing_matrix = None
         self._stems = None
 
+    def __reduce__(self):
+        return _rebuild_track, (_TrackRecord(self),)
+
+    def read(self, start=0, duration=None, sample_rate=None, dtype=None):
+        if sample_rate is None:
+            sample_rate = self.sample_rate
+        if dtype is None:
+            dtype = self.dtype
+        audio = self.decoded_stem(
+            self.stem_id, start, duration, sample_rate, dtype
+        )
+        if audio is not None:
+            return audio
+        return super(MultiTrack, self).read(start, duration, sample_rate, dtype)
+
+    read.__doc__ = Track.read.__doc__
+
     @property
     def stems(self):
         """array_like: [shape=(stems, num_samples, num_channels)]
@@ -157,25 +561,400 @@ class MultiTrack(Track):
             return self._stems
         # read from disk to save RAM otherwise
         else:
-            if not self.is_wav and os.path.exists(self.path):
-                S, rate = stempeg.read_stems(
-                    filename=self.path,
-                    start=self.chunk_start,
-                    duration=self.chunk_duration,
-                    info=self.info,
-                    sample_rate=self.sample_rate,
-                    ffmpeg_format="s16le"
-                )
+            return self.read_stems(
+                self.chunk_start, self.chunk_duration, self.sample_rate
+            )
+
+    def read_stems(self, start=0, duration=None, sample_rate=None, dtype=None):
+        """Reads an excerpt of all stems from disk
+
+        Parameters
+        ----------
+        start : float
+            offset in seconds, defaults to 0 (beginning).
+        duration : float, optional
+            duration in seconds, defaults to ``None`` (end).
+        sample_rate : float, optional
+            output sample rate, defaults to the `sample_rate` of the track.
+        dtype : np.dtype, optional
+            output data type, defaults to the `dtype` of the track.
+
+        Returns
+        -------
+        array_like
+            [shape=(stems, num_samples, num_channels)], stems are
+            ordered by `stem_id`
+        """
+        if sample_rate is None:
+            sample_rate = self.sample_rate
+        if dtype is None:
+            dtype = self.dtype
+        if self.pcm_cache is not None:
+            S = self.load_stems(start, duration, sample_rate, dtype)
+        elif not self.is_wav and os.path.exists(self.path):
+            S = self.load_stems(start, duration, sample_rate, dtype)
+            if not S.flags.writeable:
+                # do not hand out the shared decoded excerpt
+                S = S.copy()
+        else:
+            S = []
+            S.append(self.read(start, duration, sample_rate, dtype))
+            # append sources in order of stem_ids
+            for k, v in sorted(self.sources.items(), key=lambda x: x[1].stem_id):
+                S.append(v.read(start, duration, sample_rate, dtype))
+            S = np.array(S)
+        return S
+
+    def envelope(self, hop=0.1):
+        """Returns the RMS envelope of all stems
+
+        The envelope is computed from the whole track on first call and
+        kept in `envelopes`, keyed by `hop`.
+
+        Parameters
+        ----------
+        hop : float
+            frame length in seconds, defaults to `0.1`
+
+        Returns
+        -------
+        np.ndarray
+            [shape=(stems, frames)], stems are ordered by `stem_id`
+        """
+        envelope = self.envelopes.get(hop)
+        if envelope is None:
+            envelope = rms_envelope(
+                self.read_stems(dtype=np.float32),
+                self.sample_rate or self.rate,
+                hop,
+            )
+            self.envelopes[hop] = envelope
+        return envelope
+
+    def mix_targets(self, stems, targets=None, dtype=None):
+        """Mixes several targets from a stems tensor with one matrix product
+
+        Parameters
+        ----------
+        stems : array_like
+            [shape=(stems, num_samples, num_channels)], as returned by
+            ``load_stems``
+        targets : list[str], optional
+            names of the mixed targets, defaults to all targets
+        dtype : np.dtype, optional
+            output data type, e.g. `float32`. Defaults to ``None``
+            (data type of the decoded audio, `float64` for `int16`).
+
+        Returns
+        -------
+        array_like
+            [shape=(targets, num_samples, num_channels)]
+        """
+        names = list(self.targets)
+        if targets is None:
+            targets = names
+        if self.mixing_matrix is None:
+            return np.array(
+                [self.targets[name].mix(stems, dtype=dtype) for name in targets]
+            )
+
+        start = time.perf_counter()
+        if stems.dtype.kind != "f":
+            # mix integer PCM in float scale
+            stems = to_dtype(stems, np.float64 if dtype is None else np.float32)
+        # the mixture (first stem) is not part of any target
+        matrix = self.mixing_matrix[[names.index(name) for name in targets], 1:]
+        audio = to_dtype(
+            np.tensordot(matrix.astype(stems.dtype), stems[1:], axes=1), dtype
+        )
+        if self.stats is not None:
+            seconds = time.perf_counter() - start
+            for _ in targets:
+                self.stats.mix(seconds / len(targets))
+        return audio
+
+    def stem_index(self, stem_id):
+        """Returns the position of `stem_id` in the stems tensor"""
+        stem_ids = [self.stem_id] + sorted(
+            source.stem_id for source in self.sources.values()
+        )
+        return stem_ids.index(stem_id)
+
+    def decoded_stems(
+        self, chunk_start=0, chunk_duration=None, sample_rate=None, dtype=None
+    ):
+        """Returns the already decoded stems tensor of an excerpt or `None`
+
+        Excerpts are looked up in the ``PCMCache``, else in the
+        ``AudioCache``, else in the memo of the last decoded excerpt. The
+        memo is only used without an ``AudioCache``, which holds the last
+        excerpts anyway.
+        """
+        if self.pcm_cache is not None and self.pcm_cache.serves(self, sample_rate):
+            stems = self.pcm_cache.read(self, chunk_start, chunk_duration, dtype)
+            kind = "pcm"
+        else:
+            key = self._excerpt_key(
+                chunk_start, chunk_duration, sample_rate, dtype
+            )
+            if self.audio_cache is not None:
+                stems = self.audio_cache.get(key)
+                kind = "memory"
             else:
-                rate = self.rate
-                S = []
-                S.append(self.audio)
-                # append sources in order of stem_ids
-                for k, v in sorted(self.sources.items(), key=lambda x: x[1].stem_id):
-                    S.append(v.audio)
-                S = np.array(S)
-            self._rate = rate
-            return S
+                stems = self.memo.get(key)
+                kind = "memo"
+        if stems is not None and self.stats is not None:
+            self.stats.hit(kind)
+        return stems
+
+    def decoded_stem(
+        self,
+        stem_id,
+        chunk_start=0,
+        chunk_duration=None,
+        sample_rate=None,
+        dtype=None
+    ):
+        """Returns the audio of `stem_id` from already decoded stems or `None`
+
+        With an ``AudioCache``, all stems of the excerpt are decoded and
+        cached, so that each excerpt is cached once as a stems tensor.
+        """
+        if self.audio_cache is not None:
+            stems = self.load_stems(
+                chunk_start, chunk_duration, sample_rate, dtype
+            )
+        else:
+            stems = self.decoded_stems(
+                chunk_start, chunk_duration, sample_rate, dtype
+            )
+        if stems is None:
+            return None
+        audio = stems[self.stem_index(stem_id)]
+        if self.pcm_cache is None:
+            # do not hand out the shared decoded excerpt
+            audio = audio.copy()
+        return audio
+
+    def load_stems(
+        self, chunk_start=0, chunk_duration=None, sample_rate=None, dtype=None
+    ):
+        """Returns all stems of an excerpt, decoded with a single ffmpeg call
+
+        The decoded excerpt is shared with all ``Source`` and ``Target``
+        objects of this track that read the same excerpt. It is therefore
+        returned read-only. Whole tracks (`chunk_duration=None`) are not
+        shared and returned writeable. With a ``PCMCache``, the excerpt is
+        a slice of the memory-mapped cache file. With an ``AudioCache``,
+        excerpts are kept in memory under the key
+        `(streams, chunk_start, chunk_duration, sample_rate, dtype)`.
+
+        Parameters
+        ----------
+        chunk_start : float
+            offset in seconds, defaults to 0 (beginning).
+        chunk_duration : float, optional
+            duration in seconds, defaults to ``None`` (end).
+        sample_rate : float, optional
+            output sample rate, defaults to ``None`` (native rate).
+        dtype : np.dtype, optional
+            output data type, defaults to ``None`` (`float64`, or the data
+            type of the ``PCMCache``).
+
+        Returns
+        -------
+        array_like
+            [shape=(stems, num_samples, num_channels)], stems are
+            ordered by `stem_id`
+        """
+        stems = self.decoded_stems(
+            chunk_start, chunk_duration, sample_rate, dtype
+        )
+        if stems is not None:
+            return stems
+
+        stems = self.decode_stems(
+            chunk_start, chunk_duration, sample_rate, dtype
+        )
+        key = self._excerpt_key(chunk_start, chunk_duration, sample_rate, dtype)
+        if self.audio_cache is not None:
+            self.audio_cache.put(key, stems)
+        elif chunk_duration is not None:
+            # whole tracks are not kept alive after the caller drops them
+            self.memo.put(key, stems)
+        return stems
+
+    def decode_stems(
+        self, chunk_start=0, chunk_duration=None, sample_rate=None, dtype=None
+    ):
+        """Decodes all stems of an excerpt from disk with a single ffmpeg call
+
+        Parameters
+        ----------
+        chunk_start : float
+            offset in seconds, defaults to 0 (beginning).
+        chunk_duration : float, optional
+            duration in seconds, defaults to ``None`` (end).
+        sample_rate : float, optional
+            output sample rate, defaults to ``None`` (native rate).
+        dtype : np.dtype, optional
+            output data type, defaults to ``None`` (`float64`). `int16`
+            returns the decoded PCM without conversion.
+
+        Returns
+        -------
+        array_like
+            [shape=(stems, num_samples, num_channels)], stems are
+            ordered by `stem_id`
+        """
+        start = time.perf_counter()
+        stems = read_streams(
+            self._streams(),
+            channels=self.channels,
+            start=chunk_start,
+            duration=chunk_duration,
+            sample_rate=sample_rate,
+            dtype=dtype or np.float64,
+        )
+        if self.stats is not None:
+            self.stats.decode(
+                self.name,
+                stems,
+                time.perf_counter() - start,
+                self._excerpt_key(
+                    chunk_start, chunk_duration, sample_rate, dtype
+                ),
+            )
+        return stems
+
+    def iter_blocks(
+        self,
+        block_size,
+        hop=None,
+        targets=None,
+        start=0,
+        duration=None,
+        sample_rate=None,
+        dtype=None,
+    ):
+        """Yields consecutive blocks of the mixture and the targets
+
+        All stems are decoded by one ffmpeg process that stays open while
+        the blocks are consumed (or sliced from the ``PCMCache``), so that
+        a whole track can be processed with bounded memory. Blocks overlap
+        by `block_size - hop` samples, the last block is padded with zeros.
+
+        Parameters
+        ----------
+        block_size : int
+            number of samples per block
+        hop : int, optional
+            number of samples between the starts of two blocks, defaults
+            to `block_size` (no overlap)
+        targets : list[str], optional
+            names of the returned targets, defaults to all targets
+        start : float
+            offset in seconds, defaults to 0 (beginning).
+        duration : float, optional
+            duration in seconds, defaults to ``None`` (end).
+        sample_rate : float, optional
+            output sample rate, defaults to the `sample_rate` of the track.
+        dtype : np.dtype, optional
+            output data type, defaults to the `dtype` of the track.
+
+        Yields
+        ------
+        mixture : array_like
+            [shape=(block_size, num_channels)]
+        targets : array_like
+            [shape=(targets, block_size, num_channels)]
+        """
+        if sample_rate is None:
+            sample_rate = self.sample_rate
+        if dtype is None:
+            dtype = self.dtype
+        if targets is None:
+            targets = list(self.targets)
+
+        if self.pcm_cache is not None and self.pcm_cache.serves(self, sample_rate):
+            blocks = self._iter_cached_blocks(
+                block_size, hop, start, duration, dtype
+            )
+        else:
+            blocks = iter_streams(
+                self._streams(),
+                channels=self.channels,
+                block_size=block_size,
+                hop=hop,
+                start=start,
+                duration=duration,
+                sample_rate=sample_rate,
+                dtype=dtype or np.float64,
+            )
+
+        try:
+            while True:
+                decode_start = time.perf_counter()
+                stems = next(blocks, None)
+                if stems is None:
+                    return
+                if self.stats is not None:
+                    self.stats.decode(
+                        self.name, stems, time.perf_counter() - decode_start
+                    )
+                yield stems[self.stem_index(self.stem_id)], self.mix_targets(
+                    stems, targets, dtype=dtype
+                )
+        finally:
+            # stops the decoder when the consumer stops early
+            blocks.close()
+
+    def _iter_cached_blocks(self, block_size, hop, start, duration, dtype):
+        if hop is None:
+            hop = block_size
+        if not 0 < hop <= block_size:
+            raise ValueError("`hop` has to be in (0, block_size]")
+        rate = self.pcm_cache.rate(self)
+        first = int(round((start or 0) * rate))
+        last = len(self.pcm_cache.stems(self)[0])
+        if duration is not None:
+            last = min(last, first + int(round(duration * rate)))
+
+        position = first
+        while position < last:
+            stop = min(position + block_size, last)
+            stems = self.pcm_cache.read_samples(self, position, stop, dtype)
+            if stop - position < block_size:
+                padding = ((0, 0), (0, block_size - (stop - position)), (0, 0))
+                stems = np.pad(stems, padding)
+            yield stems
+            if stop == last:
+                break
+            position += hop
+
+    def _excerpt_key(self, chunk_start, chunk_duration, sample_rate, dtype):
+        # the stream layout tells apart tracks of the same file with
+        # different sources, e.g. from two ``DB`` objects with other setups
+        return (
+            self._stream_layout(), chunk_start, chunk_duration, sample_rate,
+            dtype
+        )
+
+    def _streams(self):
+        if not os.path.exists(self.path):
+            raise ValueError("Oops! File %s does not exist." % self.path)
+        return list(self._stream_layout())
+
+    def _stream_layout(self):
+        # (path, stream index) of all stems, ordered by `stem_id`
+        sources = sorted(
+            (self.sources or {}).values(), key=lambda x: x.stem_id
+        )
+        if self.is_wav:
+            return ((self.path, 0),) + tuple((s.path, 0) for s in sources)
+        return ((self.path, self.stem_id),) + tuple(
+            (self.path, s.stem_id) for s in sources
+        )
 
     def __repr__(self):
         return "%s" % (self.name)
@@ -224,14 +1003,28 @@ class Source(Track):
             return self._audio
         # read from disk to save RAM otherwise
         else:
-            return self.multitrack.load_audio(
-                self.path,
-                self.stem_id,
+            return self.read(
                 self.multitrack.chunk_start,
                 self.multitrack.chunk_duration,
                 self.multitrack.sample_rate
             )
 
+    def read(self, start=0, duration=None, sample_rate=None, dtype=None):
+        if sample_rate is None:
+            sample_rate = self.multitrack.sample_rate
+        if dtype is None:
+            dtype = self.multitrack.dtype
+        audio = self.multitrack.decoded_stem(
+            self.stem_id, start, duration, sample_rate, dtype
+        )
+        if audio is not None:
+            return audio
+        return self.multitrack.load_audio(
+            self.path, self.stem_id, start, duration, sample_rate, dtype
+        )
+
+    read.__doc__ = Track.read.__doc__
+
     @audio.setter
     def audio(self, array):
         self._audio = array
@@ -251,16 +1044,23 @@ class Target(Track):
         Track object
     sources : list[Source]
         list of ``Source`` objects for this ``Target``
+    gains : list[float]
+        mixing weight of each source in this ``Target``, defaults to the
+        `gain` of the sources
     """
     def __init__(
         self, 
         multitrack,
         sources,
         name=None,  # has its own name
+        gains=None,
     ):
         self.multitrack = multitrack
         self.sources = sources
         self.name = name
+        if gains is None:
+            gains = [source.gain for source in sources]
+        self.gains = [float(gain) for gain in gains]
 
     @property
     def audio(self):
@@ -268,14 +1068,102 @@ class Target(Track):
 
         mixes audio for targets on the fly
         """
-        mix_list = []
-        for source in self.sources:
-            audio = source.audio
-            if audio is not None:
-                mix_list.append(
-                    source.gain * audio
-                )
-        return np.sum(np.array(mix_list), axis=0)
+        if all(source._audio is None for source in self.sources):
+            return self.read(
+                self.multitrack.chunk_start,
+                self.multitrack.chunk_duration,
+                self.multitrack.sample_rate
+            )
+
+        # mix sources with audio set by setter
+        mix_list = [
+            (source.audio, gain)
+            for source, gain in zip(self.sources, self.gains)
+        ]
+        mix_list = [(audio, gain) for audio, gain in mix_list if audio is not None]
+        return self._mix(
+            [audio for audio, _ in mix_list], [gain for _, gain in mix_list]
+        )
+
+    def read(self, start=0, duration=None, sample_rate=None, dtype=None):
+        """Reads and mixes an excerpt of this target from disk
+
+        Parameters
+        ----------
+        start : float
+            offset in seconds, defaults to 0 (beginning).
+        duration : float, optional
+            duration in seconds, defaults to ``None`` (end).
+        sample_rate : float, optional
+            output sample rate, defaults to the `sample_rate` of the track.
+        dtype : np.dtype, optional
+            output data type, e.g. `float32`. Defaults to the `dtype` of
+            the track.
+
+        Returns
+        -------
+        array_like
+            [shape=(num_samples, num_channels)]
+        """
+        mt = self.multitrack
+        if sample_rate is None:
+            sample_rate = mt.sample_rate
+        if dtype is None:
+            dtype = mt.dtype
+        if len(self.sources) > 1 and (mt.pcm_cache is not None or not mt.is_wav):
+            # decode all stems once, instead of once per source
+            return self.mix(
+                mt.load_stems(start, duration, sample_rate, dtype), dtype=dtype
+            )
+
+        return self._mix(
+            (
+                source.read(start, duration, sample_rate, dtype)
+                for source in self.sources
+            ),
+            self.gains,
+            dtype=dtype
+        )
+
+    def mix(self, stems, dtype=None):
+        """Mixes this target from a stems tensor
+
+        The sources are accumulated into a single output buffer, without
+        stacking scaled copies of the stems.
+
+        Parameters
+        ----------
+        stems : array_like
+            [shape=(stems, num_samples, num_channels)], as returned by
+            ``MultiTrack.load_stems``
+        dtype : np.dtype, optional
+            output data type, e.g. `float32`. Defaults to ``None``
+            (data type of the decoded audio).
+
+        Returns
+        -------
+        array_like
+            [shape=(num_samples, num_channels)]
+        """
+        return self._mix(
+            (
+                stems[self.multitrack.stem_index(source.stem_id)]
+                for source in self.sources
+            ),
+            self.gains,
+            dtype=dtype
+        )
+
+    def _mix(self, audios, gains, dtype=None):
+        stats = self.multitrack.stats
+        if stats is None:
+            return mix_sources(audios, gains, dtype)
+        # read the sources first, so that only the mixing is timed
+        audios = list(audios)
+        start = time.perf_counter()
+        audio = mix_sources(audios, gains, dtype)
+        stats.mix(time.perf_counter() - start)
+        return audio
 
     @property
     def rate(self):
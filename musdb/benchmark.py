@@ -0,0 +1,250 @@
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+from musdb import DB, EstimatesWriter, Loader
+from musdb.version import version
+
+
+def _read_excerpt(request):
+    track, start, duration = request
+    return track.read_stems(start, duration)
+
+
+def _result(benchmark, seconds, items, audio_duration=None, **params):
+    result = dict(params)
+    result.update(
+        benchmark=benchmark,
+        seconds=seconds,
+        items=items,
+        items_per_second=items / max(seconds, 1e-9),
+    )
+    if audio_duration is not None:
+        result["realtime_factor"] = audio_duration / max(seconds, 1e-9)
+    return result
+
+
+def bench_construction(root, is_wav, sample_rate):
+    """Measures the time to parse the dataset and probe all tracks"""
+    start = time.perf_counter()
+    mus = DB(root=root, is_wav=is_wav, sample_rate=sample_rate)
+    for track in mus:
+        track.duration
+    return _result("construction", time.perf_counter() - start, len(mus))
+
+
+def bench_full_tracks(mus, workers):
+    """Measures decoding all stems of all full tracks"""
+    audio_duration = 0.0
+    start = time.perf_counter()
+    with Loader(mus, workers=workers) as loader:
+        for track, stems in loader:
+            audio_duration += stems.shape[1] / float(mus.sample_rate or track.rate)
+    return _result(
+        "full_tracks", time.perf_counter() - start, len(mus), audio_duration
+    )
+
+
+def bench_excerpts(mus, workers, nb_excerpts, duration, seed=42):
+    """Measures reading all stems of random excerpts"""
+    rng = np.random.RandomState(seed)
+    tracks = [track for track in mus if track.duration >= duration]
+    requests = []
+    for _ in range(nb_excerpts):
+        track = tracks[rng.randint(len(tracks))]
+        requests.append(
+            (track, rng.uniform(0, track.duration - duration), duration)
+        )
+
+    start = time.perf_counter()
+    with Loader(requests, fn=_read_excerpt, workers=workers) as loader:
+        for stems in loader:
+            pass
+    return _result(
+        "excerpts",
+        time.perf_counter() - start,
+        nb_excerpts,
+        nb_excerpts * duration,
+    )
+
+
+def bench_mixing(mus, repeat=10):
+    """Measures mixing all targets from already decoded stems"""
+    decoded = [(track, track.read_stems()) for track in mus]
+    items = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for track, stems in decoded:
+            track.mix_targets(stems)
+            items += len(track.targets)
+    return _result("mixing", time.perf_counter() - start, items)
+
+
+def bench_save_estimates(mus, workers, write_stems=False):
+    """Measures writing the targets of all tracks as estimates"""
+    estimates = [
+        (track, {name: target.audio for name, target in track.targets.items()})
+        for track in mus
+    ]
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as estimates_dir:
+        with EstimatesWriter(
+            estimates_dir, write_stems=write_stems, workers=workers
+        ) as writer:
+            for track, user_estimates in estimates:
+                writer.write(track, user_estimates)
+        seconds = time.perf_counter() - start
+    return _result(
+        "save_estimates_stems" if write_stems else "save_estimates",
+        seconds,
+        len(estimates),
+    )
+
+
+def run(
+    root,
+    modes=("stem", "wav"),
+    workers=(1, 4),
+    sample_rates=(None,),
+    nb_excerpts=100,
+    excerpt_duration=1.0,
+):
+    """Runs all benchmarks
+
+    Parameters
+    ----------
+    root : str
+        musdb root path, e.g. the bundled `data/MUS-STEMS-SAMPLE`
+    modes : list[str]
+        `stem` and/or `wav`
+    workers : list[int]
+        numbers of loader and writer workers
+    sample_rates : list[float]
+        output sample rates, `None` is the native rate
+    nb_excerpts : int
+        number of random excerpts per run
+    excerpt_duration : float
+        excerpt duration in seconds
+
+    Returns
+    -------
+    Dict
+        machine information and a list of results
+    """
+    results = []
+    for mode in modes:
+        is_wav = mode == "wav"
+        for sample_rate in sample_rates:
+            params = dict(mode=mode, sample_rate=sample_rate)
+            result = bench_construction(root, is_wav, sample_rate)
+            result.update(params, workers=None)
+            results.append(result)
+
+            mus = DB(root=root, is_wav=is_wav, sample_rate=sample_rate)
+            result = bench_mixing(mus)
+            result.update(params, workers=None)
+            results.append(result)
+
+            for nb_workers in workers:
+                for result in [
+                    bench_full_tracks(mus, nb_workers),
+                    bench_excerpts(
+                        mus, nb_workers, nb_excerpts, excerpt_duration
+                    ),
+                    bench_save_estimates(mus, nb_workers),
+                    bench_save_estimates(mus, nb_workers, write_stems=True),
+                ]:
+                    result.update(params, workers=nb_workers)
+                    results.append(result)
+
+    return {
+        "musdb": version,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "root": root,
+        "results": results,
+    }
+
+
+def musdb_bench(inargs=None):
+    """
+    cli application to benchmark loading the musdb dataset
+    """
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        'musdb_root',
+        type=str,
+        nargs='?',
+        default='data/MUS-STEMS-SAMPLE',
+        help='musdb root, defaults to the bundled sample data',
+    )
+
+    parser.add_argument(
+        '--modes', type=str, nargs='+', default=['stem', 'wav'],
+        choices=['stem', 'wav'],
+    )
+
+    parser.add_argument(
+        '--workers', type=int, nargs='+', default=[1, 4],
+    )
+
+    parser.add_argument(
+        '--sample-rates', type=float, nargs='+', default=None,
+        help='output sample rates, defaults to the native rate',
+    )
+
+    parser.add_argument(
+        '--excerpts', type=int, default=100,
+        help='number of random excerpts',
+    )
+
+    parser.add_argument(
+        '--excerpt-duration', type=float, default=1.0,
+    )
+
+    parser.add_argument(
+        '--output', type=str, default=None,
+        help='write the results to this json file',
+    )
+
+    args = parser.parse_args(inargs)
+
+    report = run(
+        args.musdb_root,
+        modes=args.modes,
+        workers=args.workers,
+        sample_rates=args.sample_rates or [None],
+        nb_excerpts=args.excerpts,
+        excerpt_duration=args.excerpt_duration,
+    )
+
+    for result in report["results"]:
+        print(
+            "%-22s %-5s rate=%-7s workers=%-4s %8.3fs %9.1f items/s%s"
+            % (
+                result["benchmark"],
+                result["mode"],
+                result["sample_rate"] or "native",
+                result["workers"] or "-",
+                result["seconds"],
+                result["items_per_second"],
+                " %7.1fx realtime" % result["realtime_factor"]
+                if "realtime_factor" in result else "",
+            )
+        )
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    return report
+
+
+if __name__ == '__main__':
+    musdb_bench(sys.argv[1:])
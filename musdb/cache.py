@@ -0,0 +1,296 @@
+import collections
+import os
+import tempfile
+import threading
+import zlib
+import numpy as np
+from .decode import to_dtype
+
+
+class PCMCache(object):
+    """
+    On-disk cache of decoded stems
+
+    Each track is decoded once into a raw `.npy` file of
+    shape `(stems, samples, channels)`. Later reads are slices of a
+    read-only ``np.memmap`` and do not invoke ffmpeg.
+
+    Parameters
+    ----------
+    cache_dir : str
+        folder the decoded tracks are saved to
+    dtype : {'float32', 'int16'}
+        data type of the cached PCM. `float32` slices are returned without
+        copy, `int16` halves the cache size but is converted when read.
+        Defaults to `float32`.
+    sample_rate : float, optional
+        resample the tracks once when they are cached, so that reads at
+        this rate do not resample. Defaults to `None` (native rate).
+    """
+
+    def __init__(self, cache_dir, dtype="float32", sample_rate=None):
+        if np.dtype(dtype) not in (np.dtype("float32"), np.dtype("int16")):
+            raise ValueError("cache dtype has to be `float32` or `int16`")
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.dtype = np.dtype(dtype)
+        self.sample_rate = sample_rate
+        self._mmaps = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # memory maps and locks are reopened in the unpickling process
+        return {
+            "cache_dir": self.cache_dir,
+            "dtype": self.dtype,
+            "sample_rate": self.sample_rate,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(
+            state["cache_dir"], state["dtype"], state.get("sample_rate")
+        )
+
+    def path(self, track):
+        """Returns the cache file path of a track
+
+        Tracks are saved as `name.<layout>.<dtype>.npy`, resampled tracks
+        as `name.<layout>.<dtype>.<rate>Hz.npy`, so that caches of
+        different stem layouts (setups), data types and rates can share
+        one `cache_dir`. `layout` is a hash of the decoded streams.
+        """
+        if self.sample_rate is None:
+            filename = "%s.%s.%s.npy" % (
+                track.name, _layout_id(track), self.dtype.name
+            )
+        else:
+            filename = "%s.%s.%s.%dHz.npy" % (
+                track.name, _layout_id(track), self.dtype.name,
+                self.sample_rate
+            )
+        return os.path.join(self.cache_dir, track.subset or "", filename)
+
+    def rate(self, track):
+        """Returns the sample rate of the cached audio of a track"""
+        return self.sample_rate or track.rate
+
+    def serves(self, track, sample_rate=None):
+        """Returns `True` if reads of `track` at `sample_rate` are cached
+
+        Parameters
+        ----------
+        track : MultiTrack
+            musdb track object
+        sample_rate : float, optional
+            requested sample rate, `None` is the native rate
+        """
+        return (sample_rate or track.rate) == self.rate(track)
+
+    def stems(self, track):
+        """Returns the memory-mapped stems of a track, decodes it if needed
+
+        Parameters
+        ----------
+        track : MultiTrack
+            musdb track object
+
+        Returns
+        -------
+        np.memmap
+            [shape=(stems, num_samples, num_channels)]
+        """
+        path = self.path(track)
+        stems = self._mmaps.get(path)
+        if stems is None:
+            with self._path_lock(path):
+                stems = self._mmaps.get(path)
+                if stems is None:
+                    if not self._is_valid(path, track):
+                        # decode to the cache dtype, without a float64 copy
+                        self._write(
+                            path,
+                            track.decode_stems(
+                                sample_rate=self.sample_rate, dtype=self.dtype
+                            ),
+                        )
+                    stems = np.load(path, mmap_mode="r")
+                    self._mmaps[path] = stems
+        return stems
+
+    def read(self, track, chunk_start=0, chunk_duration=None, dtype=None):
+        """Returns a slice of the cached stems of a track
+
+        Parameters
+        ----------
+        track : MultiTrack
+            musdb track object
+        chunk_start : float
+            offset in seconds, defaults to 0 (beginning).
+        chunk_duration : float, optional
+            duration in seconds, defaults to ``None`` (end).
+        dtype : np.dtype, optional
+            output data type. Slices are returned without copy if `dtype`
+            matches the cache. Defaults to ``None`` (`float32` or `float64`
+            for an `int16` cache).
+
+        Returns
+        -------
+        array_like
+            [shape=(stems, num_samples, num_channels)]
+        """
+        rate = self.rate(track)
+        start = int(round((chunk_start or 0) * rate))
+        if chunk_duration is None:
+            stop = None
+        else:
+            stop = start + int(round(chunk_duration * rate))
+        return self.read_samples(track, start, stop, dtype)
+
+    def read_samples(self, track, start=0, stop=None, dtype=None):
+        """Returns the cached stems of a track between two sample positions
+
+        Parameters
+        ----------
+        track : MultiTrack
+            musdb track object
+        start : int
+            first sample, defaults to 0
+        stop : int, optional
+            sample after the last sample, defaults to ``None`` (end).
+        dtype : np.dtype, optional
+            output data type, see ``read``.
+
+        Returns
+        -------
+        array_like
+            [shape=(stems, stop - start, num_channels)]
+        """
+        stems = self.stems(track)[:, start:stop]
+        if dtype is None and self.dtype == np.int16:
+            dtype = np.float64
+        return to_dtype(stems, dtype)
+
+    def _path_lock(self, path):
+        # one lock per cache file, so that different tracks
+        # can be decoded in parallel
+        with self._lock:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def _is_valid(self, path, track):
+        # cache files are rebuilt when the track file was modified or
+        # were written with another dtype or number of stems
+        try:
+            if os.path.getmtime(path) < os.path.getmtime(track.path):
+                return False
+            stems = np.load(path, mmap_mode="r")
+            return (
+                stems.dtype == self.dtype
+                and len(stems) == 1 + len(track.sources)
+            )
+        except (OSError, ValueError):
+            return False
+
+    def _write(self, path, stems):
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        # write to a temporary file first, so that readers never
+        # see an incomplete cache file
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".npy")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, to_dtype(stems, self.dtype))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+def _layout_id(track):
+    # short hash of the (file, stream) of each stem, independent of the
+    # dataset root so that a cache folder can be moved with the dataset
+    layout = [
+        (os.path.basename(path), stream)
+        for path, stream in track._stream_layout()
+    ]
+    return "%08x" % zlib.crc32(repr(layout).encode("utf-8"))
+
+
+class AudioCache(object):
+    """
+    In-memory LRU cache of decoded audio with a byte budget
+
+    Tracks of a ``DB`` cache each excerpt once as a stems tensor, keyed
+    by `(streams, start, duration, sample_rate, dtype)`. When the cached
+    arrays exceed `max_bytes`, the least recently used entries are dropped.
+    Cached arrays are read-only since they are shared by all readers.
+
+    Parameters
+    ----------
+    max_bytes : int
+        maximum size of all cached arrays in bytes
+
+    Attributes
+    ----------
+    nbytes : int
+        current size of all cached arrays in bytes
+    hits : int
+        number of reads served from the cache
+    misses : int
+        number of reads that had to be decoded
+    """
+
+    def __init__(self, max_bytes):
+        if max_bytes < 0:
+            raise ValueError("`max_bytes` has to be non-negative")
+        self.max_bytes = int(max_bytes)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # each process starts with an empty cache of the same budget
+        return {"max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state["max_bytes"])
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Returns the cached array of `key` or `None`"""
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return audio
+
+    def put(self, key, audio):
+        """Adds an array to the cache, evicting old entries if needed
+
+        Arrays larger than `max_bytes` are not cached.
+        """
+        if audio.nbytes > self.max_bytes:
+            return
+        audio.flags.writeable = False
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key).nbytes
+            self._entries[key] = audio
+            self.nbytes += audio.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def clear(self):
+        """Removes all entries and resets the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,230 @@
+import subprocess as sp
+import numpy as np
+import stempeg
+
+
+def _ffmpeg_cmd(streams, start=None, duration=None, sample_rate=None):
+    """Builds an ffmpeg command that decodes all `streams` in one process
+
+    Parameters
+    ----------
+    streams : list[tuple(str, int)]
+        list of ``(path, stream_index)`` pairs. Streams of the same file
+        share one ffmpeg input.
+    start : float, optional
+        start position in seconds
+    duration : float, optional
+        duration in seconds, defaults to `None` (end of file)
+    sample_rate : float, optional
+        output sample rate, defaults to `None` (native rate)
+
+    Returns
+    -------
+    list[str]
+        ffmpeg command line
+    """
+    inputs = []
+    labels = []
+    for path, stream_idx in streams:
+        if path not in inputs:
+            inputs.append(path)
+        labels.append("%d:%d" % (inputs.index(path), stream_idx))
+
+    cmd = [stempeg.cmds.FFMPEG_PATH or "ffmpeg", "-nostdin", "-loglevel", "error"]
+    for path in inputs:
+        cmd += ["-i", path]
+
+    if len(labels) == 1:
+        cmd += ["-map", labels[0]]
+    else:
+        # merge all streams into one interleaved multichannel stream,
+        # channels are ordered by input stream
+        graph = "".join("[%s]" % label for label in labels)
+        graph += "amerge=inputs=%d[stems]" % len(labels)
+        cmd += ["-filter_complex", graph, "-map", "[stems]"]
+
+    if start is not None:
+        cmd += ["-ss", "%f" % start]
+    if duration is not None:
+        cmd += ["-t", "%f" % duration]
+    if sample_rate is not None:
+        cmd += ["-ar", "%d" % sample_rate]
+
+    cmd += ["-vn", "-f", "s16le", "pipe:"]
+    return cmd
+
+
+def to_dtype(audio, dtype=None):
+    """Converts PCM audio between `int16` and float data types
+
+    Float audio is scaled to `[-1, 1)`, `int16` audio to the full integer
+    range. `audio` is returned without copy if it already has `dtype`.
+
+    Parameters
+    ----------
+    audio : array_like
+        float or `int16` audio
+    dtype : np.dtype, optional
+        output data type, defaults to ``None`` (no conversion)
+
+    Returns
+    -------
+    array_like
+        audio with data type `dtype`
+    """
+    if dtype is None or audio.dtype == np.dtype(dtype):
+        return audio
+    scale = np.iinfo(np.int16).max + 1.0
+    if np.dtype(dtype) == np.int16:
+        return np.clip(
+            np.round(audio * scale), np.iinfo(np.int16).min, np.iinfo(np.int16).max
+        ).astype(np.int16)
+    if audio.dtype == np.int16:
+        return np.divide(audio, scale, dtype=dtype)
+    return audio.astype(dtype)
+
+
+def read_streams(
+    streams,
+    channels,
+    start=None,
+    duration=None,
+    sample_rate=None,
+    dtype=np.float64,
+):
+    """Decodes several audio streams with a single ffmpeg invocation
+
+    Parameters
+    ----------
+    streams : list[tuple(str, int)]
+        list of ``(path, stream_index)`` pairs to be decoded
+    channels : int
+        number of channels per stream
+    start : float, optional
+        start position in seconds
+    duration : float, optional
+        duration in seconds, defaults to `None` (end of file)
+    sample_rate : float, optional
+        output sample rate, defaults to `None` (native rate)
+    dtype : np.dtype, optional
+        output data type, `float64` (default), `float32` or `int16`.
+        `int16` returns the decoded buffer without conversion.
+
+    Returns
+    -------
+    array_like
+        [shape=(nb_streams, num_samples, num_channels)]
+    """
+    process = sp.Popen(
+        _ffmpeg_cmd(streams, start, duration, sample_rate),
+        stdout=sp.PIPE,
+        stderr=sp.PIPE,
+    )
+    buffer, err = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError("ffmpeg error: %s" % err.decode(errors="replace"))
+
+    pcm = np.frombuffer(buffer, dtype="<i2").reshape(-1, len(streams), channels)
+    # (samples, streams, channels) -> (streams, samples, channels)
+    if np.dtype(dtype) == np.int16:
+        return pcm.transpose(1, 0, 2)
+    audio = np.ascontiguousarray(pcm.transpose(1, 0, 2), dtype=dtype)
+    audio /= np.iinfo(np.int16).max + 1.0
+    return audio
+
+
+def iter_streams(
+    streams,
+    channels,
+    block_size,
+    hop=None,
+    start=None,
+    duration=None,
+    sample_rate=None,
+    dtype=np.float64,
+):
+    """Decodes several audio streams block-wise with a single ffmpeg process
+
+    The ffmpeg pipe stays open while the blocks are consumed, so that only
+    `block_size` samples are held in memory. The last block is padded with
+    zeros.
+
+    Parameters
+    ----------
+    streams : list[tuple(str, int)]
+        list of ``(path, stream_index)`` pairs to be decoded
+    channels : int
+        number of channels per stream
+    block_size : int
+        number of samples per block
+    hop : int, optional
+        number of samples between the starts of two blocks, defaults to
+        `block_size` (no overlap)
+    start : float, optional
+        start position in seconds
+    duration : float, optional
+        duration in seconds, defaults to `None` (end of file)
+    sample_rate : float, optional
+        output sample rate, defaults to `None` (native rate)
+    dtype : np.dtype, optional
+        output data type, `float64` (default), `float32` or `int16`
+
+    Yields
+    ------
+    array_like
+        [shape=(nb_streams, block_size, num_channels)]
+    """
+    if hop is None:
+        hop = block_size
+    if not 0 < hop <= block_size:
+        raise ValueError("`hop` has to be in (0, block_size]")
+
+    frame_size = len(streams) * channels * 2
+    block = np.zeros((block_size, len(streams), channels), dtype="<i2")
+    filled = 0
+
+    process = sp.Popen(
+        _ffmpeg_cmd(streams, start, duration, sample_rate),
+        stdout=sp.PIPE,
+        stderr=sp.PIPE,
+    )
+    try:
+        while True:
+            buffer = process.stdout.read((block_size - filled) * frame_size)
+            nb_frames = len(buffer) // frame_size
+            block[filled:filled + nb_frames] = np.frombuffer(
+                buffer, dtype="<i2", count=nb_frames * frame_size // 2
+            ).reshape(nb_frames, len(streams), channels)
+            filled += nb_frames
+            if filled < block_size:
+                # end of stream, yield the last block if it has new samples
+                if nb_frames > 0:
+                    block[filled:] = 0
+                    yield _block_to_dtype(block, dtype)
+                break
+            yield _block_to_dtype(block, dtype)
+            # keep the overlap for the next block
+            block[:block_size - hop] = block[hop:]
+            filled = block_size - hop
+
+        err = process.stderr.read()
+        if process.wait() != 0:
+            raise RuntimeError(
+                "ffmpeg error: %s" % err.decode(errors="replace")
+            )
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def _block_to_dtype(block, dtype):
+    # (samples, streams, channels) -> (streams, samples, channels), always
+    # copied, since the block buffer is reused
+    if np.dtype(dtype) == np.int16:
+        return block.transpose(1, 0, 2).copy()
+    audio = np.ascontiguousarray(block.transpose(1, 0, 2), dtype=dtype)
+    audio /= np.iinfo(np.int16).max + 1.0
+    return audio
@@ -0,0 +1,125 @@
+import subprocess as sp
+import numpy as np
+import stempeg
+from .decode import to_dtype
+
+
+def _ffmpeg_cmd(
+    path,
+    nb_streams,
+    channels,
+    sample_rate,
+    stem_names=None,
+    codec=None,
+    bitrate=None,
+):
+    """Builds an ffmpeg command that encodes all streams in one process
+
+    The streams are piped to ffmpeg as one interleaved multichannel
+    ``s16le`` stream and split into one output stream per stem.
+
+    Parameters
+    ----------
+    path : str
+        output file, the extension selects the container
+    nb_streams : int
+        number of streams
+    channels : int
+        number of channels per stream
+    sample_rate : float
+        sample rate of the audio
+    stem_names : list[str], optional
+        stream titles, defaults to `None`
+    codec : str, optional
+        ffmpeg codec, defaults to `None` (default codec of the container)
+    bitrate : int, optional
+        bitrate in bits per second, defaults to `None`
+
+    Returns
+    -------
+    list[str]
+        ffmpeg command line
+    """
+    layout = {1: "mono", 2: "stereo"}.get(channels, "%dc" % channels)
+    graph = ";".join(
+        "[0:a]pan=%s|%s[s%d]" % (
+            layout,
+            "|".join(
+                "c%d=c%d" % (c, k * channels + c) for c in range(channels)
+            ),
+            k,
+        )
+        for k in range(nb_streams)
+    )
+
+    cmd = [
+        stempeg.cmds.FFMPEG_PATH or "ffmpeg",
+        "-y",
+        "-loglevel", "error",
+        "-f", "s16le",
+        "-ar", "%d" % sample_rate,
+        "-ac", "%d" % (nb_streams * channels),
+        "-i", "pipe:",
+        "-filter_complex", graph,
+    ]
+    for k in range(nb_streams):
+        cmd += ["-map", "[s%d]" % k]
+        if stem_names is not None:
+            cmd += [
+                "-metadata:s:a:%d" % k, "title=%s" % stem_names[k],
+                "-metadata:s:a:%d" % k, "handler_name=%s" % stem_names[k],
+            ]
+    if codec is not None:
+        cmd += ["-c:a", codec]
+    if bitrate is not None:
+        cmd += ["-b:a", "%d" % bitrate]
+
+    cmd += ["-vn", "-strict", "-2", path]
+    return cmd
+
+
+def write_streams(
+    path,
+    data,
+    sample_rate,
+    stem_names=None,
+    codec=None,
+    bitrate=None,
+):
+    """Encodes several audio streams into one file with a single ffmpeg call
+
+    Parameters
+    ----------
+    path : str
+        output file, e.g. `track.stem.mp4`. The container has to support
+        multiple audio streams.
+    data : array_like
+        [shape=(nb_streams, num_samples, num_channels)], float audio in
+        `[-1, 1)` or `int16` PCM
+    sample_rate : float
+        sample rate of the audio
+    stem_names : list[str], optional
+        stream titles, defaults to `None`
+    codec : str, optional
+        ffmpeg codec, defaults to `None` (default codec of the container)
+    bitrate : int, optional
+        bitrate in bits per second, defaults to `None`
+    """
+    data = np.asarray(data)
+    nb_streams, _, channels = data.shape
+    if stem_names is not None and len(stem_names) != nb_streams:
+        raise ValueError("`stem_names` has to match the number of streams")
+
+    # (streams, samples, channels) -> (samples, streams, channels)
+    pcm = to_dtype(data.transpose(1, 0, 2), np.int16).astype("<i2", copy=False)
+
+    process = sp.Popen(
+        _ffmpeg_cmd(
+            path, nb_streams, channels, sample_rate, stem_names, codec, bitrate
+        ),
+        stdin=sp.PIPE,
+        stderr=sp.PIPE,
+    )
+    _, err = process.communicate(pcm.tobytes())
+    if process.returncode != 0:
+        raise RuntimeError("ffmpeg error: %s" % err.decode(errors="replace"))
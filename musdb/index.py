@@ -0,0 +1,166 @@
+import os
+import json
+import tempfile
+import warnings
+import zipfile
+import numpy as np
+import stempeg
+
+
+class MetadataIndex(object):
+    """
+    On-disk index of track metadata
+
+    Stores the probed metadata of every track file so that ``DB``
+    does not need to call ffprobe for each track on construction.
+    Entries are invalidated when the size or modification time of
+    a file changes. RMS envelopes of the tracks are stored next to the
+    index in `.musdb_envelopes.npz`.
+
+    Parameters
+    ----------
+    root : str
+        musdb root path, the index is saved as `.musdb_index.json`
+        inside this folder.
+
+    Attributes
+    ----------
+    path : str
+        path to the index file
+    entries : Dict
+        metadata entries keyed by the file path relative to `root`
+    """
+
+    filename = ".musdb_index.json"
+    envelopes_filename = ".musdb_envelopes.npz"
+    version = 1
+
+    def __init__(self, root):
+        self.root = root
+        self.path = os.path.join(root, self.filename)
+        self.envelopes_path = os.path.join(root, self.envelopes_filename)
+        self.entries = {}
+        self._dirty = False
+        # envelopes are loaded on first use
+        self._envelopes = None
+        self._envelopes_dirty = False
+        self.load()
+
+    def load(self):
+        """Loads the index file, an invalid or outdated file is ignored"""
+        try:
+            with open(self.path, "r") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if index.get("version") == self.version:
+            self.entries = index.get("tracks", {})
+
+    def save(self):
+        """Writes the index file if entries were added or updated"""
+        if not self._dirty:
+            return
+
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"version": self.version, "tracks": self.entries}, f)
+            os.replace(tmp_path, self.path)
+            if self._envelopes_dirty:
+                fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(f, **self._envelopes)
+                os.replace(tmp_path, self.envelopes_path)
+                self._envelopes_dirty = False
+            self._dirty = False
+        except OSError as e:
+            warnings.warn("Could not write metadata index %s: %s" % (self.path, e))
+
+    def envelope(self, path, hop):
+        """Returns the stored RMS envelope of a track or `None`
+
+        Parameters
+        ----------
+        path : str
+            absolute path of the indexed track file
+        hop : float
+            hop size of the envelope in seconds
+
+        Returns
+        -------
+        np.ndarray
+            [shape=(stems, frames)], `None` if no envelope of this hop
+            size is stored or the file was modified
+        """
+        key = os.path.relpath(path, self.root)
+        entry = self.entries.get(key)
+        if entry is None or entry.get("envelope_hop") != hop:
+            return None
+        return self._load_envelopes().get(key)
+
+    def set_envelope(self, path, hop, envelope):
+        """Stores the RMS envelope of an indexed track file"""
+        key = os.path.relpath(path, self.root)
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        entry["envelope_hop"] = hop
+        self._load_envelopes()[key] = np.asarray(envelope, dtype=np.float16)
+        self._dirty = True
+        self._envelopes_dirty = True
+
+    def _load_envelopes(self):
+        if self._envelopes is None:
+            try:
+                with np.load(self.envelopes_path) as envelopes:
+                    self._envelopes = dict(envelopes)
+            except (OSError, ValueError, zipfile.BadZipFile):
+                self._envelopes = {}
+        return self._envelopes
+
+    def metadata(self, path, stem_id=0, stat=None):
+        """Returns metadata of an audio file, probes the file if needed
+
+        Parameters
+        ----------
+        path : str
+            absolute path of the audio file
+        stem_id : int
+            stem/substream ID the metadata is read from
+        stat : os.stat_result, optional
+            stat of `path`, e.g. from ``os.DirEntry.stat``. Defaults to
+            ``None`` (`path` is stat'ed).
+
+        Returns
+        -------
+        Dict
+            ``samples``, ``rate``, ``duration``, ``channels`` and
+            ``nb_stems`` of the file
+        """
+        if stat is None:
+            stat = os.stat(path)
+        key = os.path.relpath(path, self.root)
+        entry = self.entries.get(key)
+        if (
+            entry is not None
+            and entry["size"] == stat.st_size
+            and entry["mtime"] == stat.st_mtime
+            and entry["stem_id"] == stem_id
+        ):
+            return entry
+
+        info = stempeg.Info(path)
+        entry = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "stem_id": stem_id,
+            "samples": info.samples(stem_id),
+            "rate": info.rate(stem_id),
+            "duration": info.duration(stem_id),
+            "channels": info.channels(stem_id),
+            "nb_stems": info.nb_audio_streams,
+        }
+        self.entries[key] = entry
+        self._dirty = True
+        return entry
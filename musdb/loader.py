@@ -0,0 +1,109 @@
+import collections
+from concurrent import futures
+
+
+def load_stems(track):
+    """Returns the track together with its decoded stems"""
+    return track, track.stems
+
+
+class Loader(object):
+    """
+    Prefetching loader over musdb tracks or excerpts
+
+    Applies `fn` to the next `prefetch` items in background workers while
+    the consumer processes the current one. Since the decoding happens in
+    ffmpeg subprocesses, thread workers are usually sufficient.
+
+    Parameters
+    ----------
+    items : iterable
+        items to be loaded, e.g. a ``DB`` object, a list of tracks or a list
+        of excerpt requests.
+    fn : callable, optional
+        function applied to each item in the workers. Defaults to
+        ``load_stems`` which yields `(track, stems)` tuples. Has to be
+        picklable when `processes=True`.
+    workers : int, optional
+        number of background workers, defaults to `4`
+    prefetch : int, optional
+        maximum number of items loaded ahead of the consumer, defaults to
+        `2 * workers`
+    ordered : boolean, optional
+        yield results in the order of `items`, otherwise results are yielded
+        as soon as they are ready. Defaults to `True`.
+    processes : boolean, optional
+        use a process pool instead of a thread pool. Defaults to `False`.
+
+    Examples
+    --------
+    Iterate over all tracks, while the next tracks are decoded::
+
+        with musdb.Loader(mus, workers=4) as loader:
+            for track, stems in loader:
+                train(stems)
+    """
+
+    def __init__(
+        self,
+        items,
+        fn=load_stems,
+        workers=4,
+        prefetch=None,
+        ordered=True,
+        processes=False,
+    ):
+        self.items = items
+        self.fn = fn
+        self.workers = workers
+        self.prefetch = prefetch if prefetch is not None else 2 * workers
+        self.ordered = ordered
+        if processes:
+            self._executor = futures.ProcessPoolExecutor(workers)
+        else:
+            self._executor = futures.ThreadPoolExecutor(workers)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        items = iter(self.items)
+        pending = collections.deque()
+
+        def submit():
+            # fill the queue up to `prefetch` pending items
+            while len(pending) < self.prefetch:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+                pending.append(self._executor.submit(self.fn, item))
+
+        try:
+            submit()
+            while pending:
+                if self.ordered:
+                    job = pending.popleft()
+                else:
+                    done, _ = futures.wait(
+                        pending, return_when=futures.FIRST_COMPLETED
+                    )
+                    job = next(iter(done))
+                    pending.remove(job)
+                result = job.result()
+                submit()
+                yield result
+        finally:
+            # cancel prefetched items when the consumer stops early
+            for job in pending:
+                job.cancel()
+
+    def close(self):
+        """Cancels pending items and shuts down the workers"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,185 @@
+import time
+import numpy as np
+from .decode import read_streams
+
+
+class Remixer(object):
+    """
+    Creates new training mixtures from sources of different tracks
+
+    Each source of a remix is an excerpt of a randomly drawn track, scaled
+    by a random gain and optionally polarity-inverted and channel-swapped.
+    The mixture is the sum of all augmented sources and the targets are
+    mixed with the gains of the `targets` section of the setup. Sources are
+    sliced from the ``PCMCache`` of a track if it serves the sample rate,
+    else only the stream of the source is decoded. Random excerpts are
+    not put into the ``AudioCache`` of the ``DB``. All augmentations and
+    mixes of a batch are computed in one vectorized pass.
+
+    Parameters
+    ----------
+    mus : DB or DBView
+        dataset the sources are drawn from
+    duration : float
+        excerpt duration in seconds
+    targets : list[str], optional
+        names of the returned targets, defaults to all targets
+    gain : tuple(float, float), optional
+        range of the random gain of each source, defaults to `(0.25, 1.25)`
+    flip_polarity : float, optional
+        probability to invert the polarity of a source, defaults to `0.5`
+    swap_channels : float, optional
+        probability to swap the channels of a stereo source, defaults to
+        `0.5`
+    seed : int, optional
+        seed of the random generator
+    dtype : np.dtype, optional
+        float data type of the remixes, defaults to the `dtype` of the DB
+        (`float64` if not set).
+
+    Examples
+    --------
+    Train on random remixes::
+
+        remixer = musdb.Remixer(mus, duration=5.0, targets=["vocals"])
+        for mixture, targets in remixer.batches(batch_size=16):
+            train(mixture, targets)
+    """
+
+    def __init__(
+        self,
+        mus,
+        duration,
+        targets=None,
+        gain=(0.25, 1.25),
+        flip_polarity=0.5,
+        swap_channels=0.5,
+        seed=None,
+        dtype=None,
+    ):
+        if targets is None:
+            targets = mus.targets_names
+        if dtype is None:
+            dtype = mus.dtype or np.float64
+        if np.dtype(dtype).kind != "f":
+            raise ValueError("Remixes need a float `dtype`")
+
+        self.mus = mus
+        self.duration = duration
+        self.targets = list(targets)
+        self.sources = list(mus.setup["sources"])
+        self.gain = gain
+        self.flip_polarity = flip_polarity
+        self.swap_channels = swap_channels
+        self.dtype = np.dtype(dtype)
+        self.rng = np.random.RandomState(seed)
+
+        # (targets, sources) gains of the target mixes
+        self.matrix = mus.mixing_matrix[
+            np.ix_(
+                [mus.targets_names.index(name) for name in self.targets],
+                [mus.stem_names.index(source) for source in self.sources],
+            )
+        ].astype(self.dtype)
+
+        # tracks each source can be drawn from
+        tracks = [track for track in mus if track.duration >= duration]
+        self.tracks = {
+            source: [track for track in tracks if source in track.sources]
+            for source in self.sources
+        }
+        for source, source_tracks in self.tracks.items():
+            if not source_tracks:
+                raise ValueError(
+                    "No track with source `%s` is longer than %.2fs"
+                    % (source, duration)
+                )
+
+    def sample(self, batch_size=1):
+        """Returns a batch of random remixes
+
+        Parameters
+        ----------
+        batch_size : int
+            number of remixes, defaults to `1`
+
+        Returns
+        -------
+        mixture : np.ndarray
+            [shape=(batch, num_samples, num_channels)]
+        targets : np.ndarray
+            [shape=(batch, targets, num_samples, num_channels)]
+        """
+        rng = self.rng
+        sample_rate = self.mus.sample_rate
+        audio = None
+        for k, source in enumerate(self.sources):
+            tracks = self.tracks[source]
+            for b in range(batch_size):
+                track = tracks[rng.randint(len(tracks))]
+                start = rng.uniform(0, track.duration - self.duration)
+                excerpt = self._read_source(track, source, start, sample_rate)
+                if audio is None:
+                    nb_samples = int(
+                        round(self.duration * (sample_rate or track.rate))
+                    )
+                    audio = np.zeros(
+                        (batch_size, len(self.sources), nb_samples,
+                         excerpt.shape[-1]),
+                        dtype=self.dtype,
+                    )
+                n = min(len(excerpt), nb_samples)
+                audio[b, k, :n] = excerpt[:n]
+
+        # random gain and polarity of each source
+        factors = rng.uniform(
+            self.gain[0], self.gain[1], size=(batch_size, len(self.sources))
+        )
+        factors[rng.random_sample(factors.shape) < self.flip_polarity] *= -1
+        audio *= factors[:, :, None, None].astype(self.dtype)
+        if audio.shape[-1] == 2:
+            swap = rng.random_sample(factors.shape) < self.swap_channels
+            audio[swap] = audio[swap][..., ::-1]
+
+        mixture = audio.sum(axis=1)
+        targets = np.einsum("tk,bksc->btsc", self.matrix, audio)
+        return mixture, targets
+
+    def _read_source(self, track, source, start, sample_rate):
+        # one stream of a track, bypassing the memo and the `AudioCache`
+        index = track.stem_index(track.sources[source].stem_id)
+        if track.pcm_cache is not None and track.pcm_cache.serves(
+            track, sample_rate
+        ):
+            return track.pcm_cache.read(
+                track, start, self.duration, self.dtype
+            )[index]
+        decode_start = time.perf_counter()
+        audio = read_streams(
+            [track._streams()[index]],
+            channels=track.channels,
+            start=start,
+            duration=self.duration,
+            sample_rate=sample_rate,
+            dtype=self.dtype,
+        )[0]
+        if track.stats is not None:
+            track.stats.decode(
+                track.name, audio, time.perf_counter() - decode_start
+            )
+        return audio
+
+    def batches(self, batch_size=1, n=None):
+        """Yields batches of random remixes, see ``sample``
+
+        Parameters
+        ----------
+        batch_size : int
+            number of remixes per batch, defaults to `1`
+        n : int, optional
+            number of batches, defaults to `None` (infinite)
+        """
+        k = 0
+        while n is None or k < n:
+            yield self.sample(batch_size)
+            k += 1
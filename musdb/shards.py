@@ -0,0 +1,210 @@
+import json
+import os
+import tempfile
+import numpy as np
+from .cache import PCMCache
+from .decode import to_dtype
+
+
+class ShardStore(PCMCache):
+    """
+    Decoded stems of many tracks packed into a few large shard files
+
+    A shard dataset consists of `shards.json`, the header index, and raw
+    shard files `shard-00000.bin`, ... . Each track is stored as one
+    contiguous block of shape `(samples, stems, channels)` that starts at
+    an `alignment` byte boundary, so that an excerpt of all stems is a
+    single sequential read. Reads are slices of a read-only ``np.memmap``.
+
+    Parameters
+    ----------
+    root : str
+        folder containing `shards.json` and the shard files
+
+    Attributes
+    ----------
+    entries : Dict
+        header entry of each track, keyed by `(subset, name)`, with the
+        `shard`, byte `offset`, `samples`, `channels` and `stems` of the
+        track
+    """
+
+    index_filename = "shards.json"
+    version = 1
+
+    def __init__(self, root):
+        self.root = os.path.expanduser(root)
+        with open(os.path.join(self.root, self.index_filename), "r") as f:
+            index = json.load(f)
+        if index.get("version") != self.version:
+            raise ValueError(
+                "Unsupported shard index version %s" % index.get("version")
+            )
+        super(ShardStore, self).__init__(
+            self.root, dtype=index["dtype"], sample_rate=index["sample_rate"]
+        )
+        self.entries = {
+            (entry["subset"], entry["name"]): entry for entry in index["tracks"]
+        }
+
+    def __getstate__(self):
+        return {"root": self.root}
+
+    def __setstate__(self, state):
+        self.__init__(state["root"])
+
+    def tracks(self, subset):
+        """Returns the header entries of a subset, sorted by track name"""
+        return sorted(
+            (e for (s, _), e in self.entries.items() if s == subset),
+            key=lambda e: e["name"],
+        )
+
+    def path(self, track):
+        """Returns the shard file path of a track"""
+        return self.shard_path(self.entries[(track.subset, track.name)])
+
+    def shard_path(self, entry):
+        return os.path.join(self.root, entry["shard"])
+
+    def metadata(self, entry):
+        """Returns the track metadata of a header entry"""
+        return {
+            "samples": entry["samples"],
+            "rate": self.sample_rate,
+            "duration": entry["samples"] / float(self.sample_rate),
+            "channels": entry["channels"],
+        }
+
+    def rate(self, track):
+        return self.sample_rate
+
+    def serves(self, track, sample_rate=None):
+        return sample_rate in (None, self.sample_rate)
+
+    def stems(self, track):
+        """Returns the memory-mapped stems of a track
+
+        Parameters
+        ----------
+        track : MultiTrack
+            musdb track object
+
+        Returns
+        -------
+        np.memmap
+            [shape=(stems, num_samples, num_channels)], a transposed view
+            on the interleaved shard data
+        """
+        key = (track.subset, track.name)
+        stems = self._mmaps.get(key)
+        if stems is None:
+            entry = self.entries[key]
+            stems = np.memmap(
+                self.shard_path(entry),
+                dtype=self.dtype,
+                mode="r",
+                offset=entry["offset"],
+                shape=(entry["samples"], len(entry["stems"]), entry["channels"]),
+            ).transpose(1, 0, 2)
+            self._mmaps[key] = stems
+        return stems
+
+
+def write_shards(
+    tracks,
+    output_root,
+    shard_size=2 ** 30,
+    dtype="float32",
+    alignment=2 ** 20,
+    sample_rate=None,
+):
+    """Packs the decoded stems of `tracks` into shard files
+
+    Parameters
+    ----------
+    tracks : iterable
+        musdb ``MultiTrack`` objects, or `(track, stems)` tuples as
+        yielded by ``musdb.Loader``
+    output_root : str
+        output folder of the shard dataset
+    shard_size : int
+        a new shard is started when a shard exceeds `shard_size` bytes,
+        defaults to 1 GiB
+    dtype : {'float32', 'int16'}
+        data type of the stored PCM, defaults to `float32`
+    alignment : int
+        byte alignment of each track inside a shard, defaults to 1 MiB
+    sample_rate : float, optional
+        sample rate of the decoded stems, defaults to `None` (the
+        `sample_rate` of the tracks)
+
+    Returns
+    -------
+    list[Dict]
+        header entries of all tracks
+    """
+    os.makedirs(output_root, exist_ok=True)
+    dtype = np.dtype(dtype)
+    entries = []
+    shard = None
+    shard_index = -1
+    rate = sample_rate
+
+    def open_shard(index):
+        return open(os.path.join(output_root, "shard-%05d.bin" % index), "wb")
+
+    try:
+        for item in tracks:
+            if isinstance(item, tuple):
+                track, stems = item
+            else:
+                track = item
+                stems = track.read_stems(sample_rate=sample_rate)
+            if rate is None:
+                rate = track.sample_rate or track.rate
+            # (stems, samples, channels) -> (samples, stems, channels)
+            data = np.ascontiguousarray(
+                to_dtype(stems, dtype).transpose(1, 0, 2)
+            )
+
+            if shard is None or (
+                shard.tell() > 0 and shard.tell() + data.nbytes > shard_size
+            ):
+                if shard is not None:
+                    shard.close()
+                shard_index += 1
+                shard = open_shard(shard_index)
+            # pad to the next aligned offset
+            offset = -(-shard.tell() // alignment) * alignment
+            shard.write(b"\0" * (offset - shard.tell()))
+            shard.write(data.tobytes())
+
+            sources = sorted(track.sources.values(), key=lambda s: s.stem_id)
+            entries.append({
+                "name": track.name,
+                "subset": track.subset,
+                "shard": os.path.basename(shard.name),
+                "offset": offset,
+                "samples": data.shape[0],
+                "channels": data.shape[2],
+                "stems": ["mixture"] + [source.name for source in sources],
+            })
+    finally:
+        if shard is not None:
+            shard.close()
+
+    # the header is written last, so that incomplete datasets are not read
+    fd, tmp_path = tempfile.mkstemp(dir=output_root, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(
+            {
+                "version": ShardStore.version,
+                "dtype": dtype.name,
+                "sample_rate": rate,
+                "tracks": entries,
+            },
+            f,
+        )
+    os.replace(tmp_path, os.path.join(output_root, ShardStore.index_filename))
+    return entries
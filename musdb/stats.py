@@ -0,0 +1,134 @@
+import collections
+import threading
+
+
+class LoadStats(object):
+    """
+    Counters of the decoding and mixing work of a ``DB``
+
+    Shows whether loading is bound by decoding (ffmpeg) or by mixing
+    (numpy), and how many decodes could be avoided by caching.
+    All counters are thread-safe.
+
+    Parameters
+    ----------
+    callbacks : list[callable], optional
+        functions called as `callback(event, info)` for each `decode`,
+        `mix` and `hit` event, e.g. to forward the events to a logger.
+    max_keys : int, optional
+        number of recently decoded excerpts remembered per track to detect
+        redundant decodes, defaults to `1024`. Bounds the memory of the
+        counters when random excerpts are drawn indefinitely.
+
+    Attributes
+    ----------
+    decodes : int
+        number of ffmpeg decodes (full excerpts or blocks)
+    decoded_bytes : int
+        size of the decoded audio arrays in bytes
+    decode_seconds : float
+        seconds spent decoding with ffmpeg
+    mixes : int
+        number of mixed targets
+    mix_seconds : float
+        seconds spent mixing targets with numpy
+    hits : Dict[str, int]
+        number of reads served without decoding, by source: `memo`
+        (shared decode of the last excerpt), `memory` (``AudioCache``)
+        and `pcm` (``PCMCache``)
+    redundant_decodes : Dict[str, int]
+        number of decodes per track of an excerpt that was already
+        decoded among the last `max_keys` excerpts of the track, i.e. that
+        a cache would have avoided
+    """
+
+    def __init__(self, callbacks=None, max_keys=1024):
+        self.callbacks = list(callbacks or [])
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __getstate__(self):
+        # counters are per process
+        return {"callbacks": self.callbacks, "max_keys": self.max_keys}
+
+    def __setstate__(self, state):
+        self.__init__(state["callbacks"], state.get("max_keys", 1024))
+
+    def reset(self):
+        """Sets all counters to zero"""
+        with self._lock:
+            self.decodes = 0
+            self.decoded_bytes = 0
+            self.decode_seconds = 0.0
+            self.mixes = 0
+            self.mix_seconds = 0.0
+            self.hits = collections.Counter()
+            self.redundant_decodes = collections.Counter()
+            # hashes of the recently decoded excerpts of each track
+            self._decoded = collections.defaultdict(collections.OrderedDict)
+
+    def add_callback(self, callback):
+        """Adds a function called as `callback(event, info)`"""
+        self.callbacks.append(callback)
+
+    def decode(self, track, audio, seconds, key=None):
+        """Records a decode of `audio` of track `track`
+
+        Parameters
+        ----------
+        track : str
+            track name
+        audio : array_like
+            decoded audio
+        seconds : float
+            time spent decoding
+        key : tuple, optional
+            excerpt key, used to detect redundant decodes
+        """
+        with self._lock:
+            self.decodes += 1
+            self.decoded_bytes += audio.nbytes
+            self.decode_seconds += seconds
+            if key is not None:
+                decoded = self._decoded[track]
+                if hash(key) in decoded:
+                    self.redundant_decodes[track] += 1
+                    decoded.move_to_end(hash(key))
+                else:
+                    decoded[hash(key)] = None
+                    if len(decoded) > self.max_keys:
+                        decoded.popitem(last=False)
+        self._notify(
+            "decode", track=track, bytes=audio.nbytes, seconds=seconds
+        )
+
+    def mix(self, seconds):
+        """Records mixing one target"""
+        with self._lock:
+            self.mixes += 1
+            self.mix_seconds += seconds
+        self._notify("mix", seconds=seconds)
+
+    def hit(self, kind):
+        """Records a read of kind `memo`, `memory` or `pcm` without decoding"""
+        with self._lock:
+            self.hits[kind] += 1
+        self._notify("hit", kind=kind)
+
+    def summary(self):
+        """Returns all counters as a dict, e.g. to be logged as json"""
+        with self._lock:
+            return {
+                "decodes": self.decodes,
+                "decoded_bytes": self.decoded_bytes,
+                "decode_seconds": self.decode_seconds,
+                "mixes": self.mixes,
+                "mix_seconds": self.mix_seconds,
+                "hits": dict(self.hits),
+                "redundant_decodes": dict(self.redundant_decodes),
+            }
+
+    def _notify(self, event, **info):
+        for callback in self.callbacks:
+            callback(event, info)
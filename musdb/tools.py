@@ -1,14 +1,84 @@
+import json
+import time
 import tqdm
 import stempeg
 import argparse
+from concurrent import futures
 from pathlib import Path
-from musdb import DB
+from musdb import DB, Loader, write_shards
 import sys
 
 
+# written after all files of a track were converted, holds the
+# conversion parameters
+COMPLETE_MARKER = '.musdbconvert'
+
+
+def _read_marker(marker):
+    try:
+        with open(str(marker), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def convert_track(track, output_root, extension='.wav'):
+    """Writes the mixture and all targets of a track to `output_root`
+
+    All stems are decoded once and shared by the mixture and the targets.
+    Tracks that were already converted completely with the same sample
+    rate and extension are skipped.
+
+    Parameters
+    ----------
+    track : MultiTrack
+        musdb track object
+    output_root : str
+        output folder, the subset/name folder structure is recreated
+    extension : str
+        audio file extension, defaults to `.wav`
+
+    Returns
+    -------
+    float
+        duration of the converted audio in seconds, `0` if skipped
+    """
+    track_estimate_dir = Path(
+        output_root, track.subset, track.name
+    )
+    rate = track.sample_rate or track.rate
+    params = {'sample_rate': rate, 'extension': extension}
+    marker = track_estimate_dir / COMPLETE_MARKER
+    if _read_marker(marker) == params:
+        return 0.0
+
+    track_estimate_dir.mkdir(exist_ok=True, parents=True)
+
+    # decode all stems once, mixture and targets are read from it
+    stems = track.load_stems(
+        track.chunk_start, track.chunk_duration, track.sample_rate
+    )
+
+    # write out tracks to disk
+    stempeg.write_audio(
+        path=str(track_estimate_dir / Path('mixture').with_suffix(extension)),
+        data=stems[track.stem_index(track.stem_id)],
+        sample_rate=rate
+    )
+    for name, audio in zip(track.targets, track.mix_targets(stems)):
+        stempeg.write_audio(
+            path=str(track_estimate_dir / Path(name).with_suffix(extension)),
+            data=audio,
+            sample_rate=rate
+        )
+    with open(str(marker), 'w') as f:
+        json.dump(params, f)
+    return stems.shape[1] / float(rate)
+
+
 def musdb_convert(inargs=None):
     """
-    cli application to conver audio files to spectrogram images
+    cli application to convert the musdb stems into audio files
     """
     parser = argparse.ArgumentParser()
 
@@ -31,29 +101,86 @@ def musdb_convert(inargs=None):
         '--extension', type=str, default='.wav'
     )
 
-    args = parser.parse_args(inargs)
+    parser.add_argument(
+        '--format', type=str, default='wav', choices=['wav', 'shards'],
+        help='`shards` packs the decoded stems of all tracks into a few '
+             'large files, to be read with `DB(format="shards")`',
+    )
 
-    mus = DB(root=args.musdb_root, download=args.download)
+    parser.add_argument(
+        '--shard-size', type=int, default=1024,
+        help='maximum shard size in MB',
+    )
 
-    for track in tqdm.tqdm(mus):
+    parser.add_argument(
+        '--dtype', type=str, default='float32', choices=['float32', 'int16'],
+        help='data type of the shards',
+    )
 
-        track_estimate_dir = Path(
-            args.output_root, track.subset, track.name
-        )
-        track_estimate_dir.mkdir(exist_ok=True, parents=True)
-        # write out tracks to disk
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help='number of tracks converted in parallel processes',
+    )
 
-        stempeg.write_audio(
-            path=str(track_estimate_dir / Path('mixture').with_suffix(args.extension)),
-            data=track.audio,
-            sample_rate=track.rate
-        )
-        for name, track in track.targets.items():
-            stempeg.write_audio(
-                path=str(track_estimate_dir / Path(name).with_suffix(args.extension)),
-                data=track.audio,
-                sample_rate=track.rate
+    parser.add_argument(
+        '--sample-rate', type=float, default=None,
+        help='resample the tracks once while converting, '
+             'defaults to the native rate',
+    )
+
+    args = parser.parse_args(inargs)
+
+    mus = DB(
+        root=args.musdb_root,
+        download=args.download,
+        sample_rate=args.sample_rate,
+    )
+
+    start = time.time()
+    converted = 0
+    audio_duration = 0.0
+    if args.format == 'shards':
+        # tracks are decoded in parallel threads, but written in order
+        with Loader(mus, workers=args.workers) as loader:
+            entries = write_shards(
+                tqdm.tqdm(loader),
+                args.output_root,
+                shard_size=args.shard_size * 2 ** 20,
+                dtype=args.dtype,
+                sample_rate=args.sample_rate,
+            )
+        converted = len(entries)
+        for track, entry in zip(mus, entries):
+            audio_duration += entry['samples'] / float(
+                args.sample_rate or track.rate
             )
+    elif args.workers > 1:
+        with futures.ProcessPoolExecutor(args.workers) as pool:
+            jobs = [
+                pool.submit(convert_track, track, args.output_root, args.extension)
+                for track in mus
+            ]
+            for job in tqdm.tqdm(futures.as_completed(jobs), total=len(jobs)):
+                duration = job.result()
+                converted += duration > 0
+                audio_duration += duration
+    else:
+        for track in tqdm.tqdm(mus):
+            duration = convert_track(track, args.output_root, args.extension)
+            converted += duration > 0
+            audio_duration += duration
+
+    elapsed = time.time() - start
+    print(
+        "Converted %d tracks (%d skipped) in %.1fs: %.1f tracks/s, %.1fx realtime"
+        % (
+            converted,
+            len(mus) - converted,
+            elapsed,
+            converted / max(elapsed, 1e-9),
+            audio_duration / max(elapsed, 1e-9),
+        )
+    )
 
 
 if __name__ == '__main__':
@@ -0,0 +1,146 @@
+import os
+import threading
+from concurrent import futures
+from os import path as op
+import numpy as np
+import stempeg
+from .encode import write_streams
+
+
+def write_estimates(user_estimates, track, estimates_dir, write_stems=False):
+    """Writes `user_estimates` to disk while recreating the musdb file structure in that folder.
+
+    Parameters
+    ==========
+    user_estimates : Dict[np.array]
+        the target estimates.
+    track : Track,
+        musdb track object
+    estimates_dir : str,
+        output folder name where to save the estimates.
+    write_stems : boolean, optional
+        write all estimates into a single multi-stream file
+        `estimates_dir/subset/name.stem.mp4` with one ffmpeg call,
+        instead of one wav file per target. Defaults to `False`.
+    """
+    # write out tracks to disk
+    if write_stems:
+        subset_dir = op.join(estimates_dir, track.subset)
+        os.makedirs(subset_dir, exist_ok=True)
+        names = list(user_estimates.keys())
+        write_streams(
+            path=op.join(subset_dir, track.name + ".stem.mp4"),
+            data=np.array([user_estimates[name] for name in names]),
+            sample_rate=track.rate,
+            stem_names=names,
+        )
+    else:
+        track_estimate_dir = op.join(estimates_dir, track.subset, track.name)
+        os.makedirs(track_estimate_dir, exist_ok=True)
+        for target, estimate in list(user_estimates.items()):
+            target_path = op.join(track_estimate_dir, target + ".wav")
+            stempeg.write_audio(
+                path=target_path, data=estimate, sample_rate=track.rate
+            )
+
+
+class EstimatesWriter(object):
+    """
+    Writes estimates in background workers
+
+    ``write`` returns immediately, so that the separation of the next
+    track overlaps with encoding the estimates of the previous one. When
+    `max_pending` estimates are queued, ``write`` blocks until a worker
+    has finished, which bounds the memory held by queued estimates.
+    The file layout is the same as for ``DB.save_estimates``.
+
+    Parameters
+    ----------
+    estimates_dir : str
+        output folder name where to save the estimates.
+    write_stems : boolean, optional
+        write one multi-stream `.stem.mp4` file per track instead of one
+        wav file per target. Defaults to `False`.
+    workers : int, optional
+        number of background workers, defaults to `2`
+    max_pending : int, optional
+        maximum number of queued or running writes, defaults to
+        `2 * workers`
+
+    Examples
+    --------
+    Save the estimates while the next track is separated::
+
+        with musdb.EstimatesWriter("estimates", workers=4) as writer:
+            for track in mus:
+                writer.write(track, separate(track))
+    """
+
+    def __init__(
+        self, estimates_dir, write_stems=False, workers=2, max_pending=None
+    ):
+        self.estimates_dir = estimates_dir
+        self.write_stems = write_stems
+        self.workers = workers
+        self.max_pending = (
+            max_pending if max_pending is not None else 2 * workers
+        )
+        self._executor = futures.ThreadPoolExecutor(workers)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def write(self, track, user_estimates):
+        """Queues the estimates of a track to be written
+
+        Blocks while `max_pending` writes are queued.
+
+        Parameters
+        ----------
+        track : Track
+            musdb track object
+        user_estimates : Dict[np.array]
+            the target estimates.
+        """
+        self._slots.acquire()
+        try:
+            job = self._executor.submit(
+                write_estimates,
+                user_estimates,
+                track,
+                self.estimates_dir,
+                self.write_stems,
+            )
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending.add(job)
+        job.add_done_callback(self._done)
+
+    def _done(self, job):
+        self._slots.release()
+
+    def flush(self):
+        """Waits until all queued estimates are written
+
+        Raises the first error of a failed write.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        futures.wait(pending)
+        for job in pending:
+            job.result()
+
+    def close(self):
+        """Writes all queued estimates and shuts down the workers"""
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
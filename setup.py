@@ -55,6 +55,7 @@ if __name__ == "__main__":
         entry_points={
             "console_scripts": [
                 "musdbconvert=musdb.tools:musdb_convert",
+                "musdbbench=musdb.benchmark:musdb_bench",
             ],
         },
         zip_safe=False,
@@ -1,4 +1,7 @@
+import os
 import pytest
+from concurrent import futures
+import pickle
 import musdb.audio_classes as ac
 import musdb
 import numpy as np
@@ -88,3 +91,226 @@ def test_track(mus):
 
     track.audio = np.zeros((2, 44100))
     assert track.audio.shape == (2, 44100)
+
+
+def test_target_shared_decode(mus):
+    track = mus[0]
+    track.chunk_start = 1.0
+    track.chunk_duration = 2.0
+    accompaniment = track.targets['accompaniment'].audio
+    reference = sum(
+        track.sources[name].audio for name in ['bass', 'drums', 'other']
+    )
+    assert np.allclose(accompaniment, reference)
+
+
+def test_read(mus):
+    track = mus[0]
+    track.chunk_start = 1.0
+    track.chunk_duration = 2.0
+    audio = track.audio
+    stems = track.stems
+    vocals = track.targets['vocals'].audio
+    accompaniment = track.targets['accompaniment'].audio
+    track.chunk_start = 0
+    track.chunk_duration = None
+
+    assert np.allclose(track.read(1.0, 2.0), audio)
+    assert np.allclose(track.read_stems(1.0, 2.0), stems)
+    assert np.allclose(track.sources['vocals'].read(1.0, 2.0), vocals)
+    assert np.allclose(track.targets['vocals'].read(1.0, 2.0), vocals)
+    assert np.allclose(
+        track.targets['accompaniment'].read(1.0, 2.0), accompaniment
+    )
+
+
+def test_concurrent_reads(mus):
+    track = mus[0]
+    starts = [0.0, 1.0, 2.0, 3.0]
+    with futures.ThreadPoolExecutor(4) as pool:
+        excerpts = list(pool.map(
+            lambda start: track.targets['accompaniment'].read(start, 1.0),
+            starts
+        ))
+    for start, excerpt in zip(starts, excerpts):
+        assert np.allclose(
+            excerpt, track.targets['accompaniment'].read(start, 1.0)
+        )
+
+
+def test_mix_sources():
+    a = np.random.random((100, 2))
+    b = np.random.random((100, 2))
+    c = np.random.random((100, 2))
+    mix = ac.mix_sources([a, b, c], [1.0, 0.5, 2.0])
+    assert mix.dtype == np.float64
+    assert np.allclose(mix, a + 0.5 * b + 2.0 * c)
+
+    mix = ac.mix_sources([a, b, c], [1.0, 0.5, 2.0], dtype=np.float32)
+    assert mix.dtype == np.float32
+    assert np.allclose(mix, a + 0.5 * b + 2.0 * c, atol=1e-6)
+
+
+def test_target_dtype(mus):
+    track = mus[0]
+    target = track.targets['accompaniment']
+    audio = target.read(0, 1.0)
+    audio32 = target.read(0, 1.0, dtype=np.float32)
+    assert audio32.dtype == np.float32
+    assert np.allclose(audio32, audio, atol=1e-6)
+
+
+@pytest.mark.parametrize('dtype', ['int16', 'float32', 'float64'])
+def test_dtype(mus, dtype):
+    track = mus[0]
+    reference = track.read_stems(0, 1.0)
+    stems = track.read_stems(0, 1.0, dtype=dtype)
+    assert stems.dtype == dtype
+    assert np.allclose(
+        musdb.decode.to_dtype(stems, np.float64), reference, atol=1e-4
+    )
+
+    audio = track.read(0, 1.0, dtype=dtype)
+    assert audio.dtype == dtype
+    vocals = track.targets['vocals'].read(0, 1.0, dtype=dtype)
+    assert vocals.dtype == dtype
+    accompaniment = track.targets['accompaniment'].read(0, 1.0, dtype=dtype)
+    assert accompaniment.dtype == dtype
+
+
+def test_mix_targets(mus):
+    track = mus[0]
+    stems = track.read_stems(0, 1.0)
+    targets = track.mix_targets(stems)
+    assert targets.shape == (len(track.targets),) + stems.shape[1:]
+    for audio, target in zip(targets, track.targets.values()):
+        assert np.allclose(audio, target.mix(stems))
+
+    vocals = track.mix_targets(stems, ['vocals'], dtype=np.float32)
+    assert vocals.dtype == np.float32
+    assert np.allclose(vocals[0], track.sources['vocals'].read(0, 1.0))
+
+
+def test_overlapping_target_gains(tmp_path):
+    import shutil
+    import yaml
+    root = str(tmp_path / 'musdb')
+    shutil.copytree('data/MUS-STEMS-SAMPLE', root)
+    with open(os.path.join(musdb.__path__[0], 'configs', 'mus.yaml')) as f:
+        setup = yaml.safe_load(f)
+    setup['targets'] = {
+        'vocals': {'vocals': 1},
+        'loud_vocals': {'vocals': 2, 'drums': 0.5},
+        # sources without a stem are skipped
+        'bass': {'bass': 1, 'piano': 1},
+    }
+    with open(os.path.join(root, 'setup.yaml'), 'w') as f:
+        yaml.safe_dump(setup, f)
+
+    mus = musdb.DB(root=root, setup_file='setup.yaml')
+    track = mus[0]
+    assert track.sources['vocals'].gain == 1.0
+    assert track.targets['loud_vocals'].gains == [0.5, 2.0]
+    assert [s.name for s in track.targets['bass'].sources] == ['bass']
+    vocals = track.targets['vocals'].read(0, 1.0)
+    assert np.allclose(vocals, track.sources['vocals'].read(0, 1.0))
+    assert np.allclose(
+        track.targets['loud_vocals'].read(0, 1.0),
+        2 * vocals + 0.5 * track.sources['drums'].read(0, 1.0),
+    )
+
+    unpickled = pickle.loads(pickle.dumps(track))
+    assert np.allclose(unpickled.mixing_matrix, track.mixing_matrix)
+
+
+def test_pickle(mus):
+    track = mus[0]
+    track.chunk_duration = 1.0
+    data = pickle.dumps(track)
+    assert len(data) < 2000
+
+    unpickled = pickle.loads(data)
+    assert unpickled.name == track.name
+    assert unpickled.duration == track.duration
+    assert list(unpickled.targets) == list(track.targets)
+    for source in unpickled.sources.values():
+        assert source.multitrack is unpickled
+    assert np.allclose(unpickled.audio, track.audio)
+    assert np.allclose(
+        unpickled.targets['accompaniment'].audio,
+        track.targets['accompaniment'].audio
+    )
+
+
+@pytest.mark.parametrize('hop', [None, 22050])
+def test_iter_blocks(mus, hop):
+    track = mus[0]
+    block_size = 44100
+    blocks = list(track.iter_blocks(block_size, hop=hop, duration=3.0))
+    step = hop or block_size
+    assert len(blocks) >= int(np.ceil((3 * 44100 - block_size) / step)) + 1
+
+    for k, (mixture, targets) in enumerate(blocks[:-1]):
+        start = k * step / 44100.0
+        assert mixture.shape == (block_size, 2)
+        assert targets.shape == (len(track.targets), block_size, 2)
+        assert np.allclose(mixture, track.read(start, 1.0), atol=1e-4)
+        assert np.allclose(
+            targets[0],
+            track.targets[list(track.targets)[0]].read(start, 1.0),
+            atol=1e-4
+        )
+
+
+def test_stats():
+    events = []
+    mus = musdb.DB(root='data/MUS-STEMS-SAMPLE', stats=True)
+    mus.stats.add_callback(lambda event, info: events.append(event))
+    track = mus[0]
+    for _ in range(2):
+        track.targets['accompaniment'].read(0, 1.0)
+        track.targets['vocals'].read(0, 1.0)
+
+    summary = mus.stats.summary()
+    assert summary['decodes'] == 1
+    assert summary['decoded_bytes'] > 0
+    assert summary['mixes'] == 4
+    assert summary['hits']['memo'] >= 3
+    assert 'decode' in events and 'mix' in events
+
+    # a second decode of the same excerpt is redundant
+    track.targets['accompaniment'].read(1.0, 1.0)
+    track.targets['accompaniment'].read(0, 1.0)
+    assert mus.stats.redundant_decodes[track.name] == 1
+
+    # only the last `max_keys` excerpts of a track are remembered
+    stats = musdb.LoadStats(max_keys=2)
+    for key in [1, 2, 3, 1]:
+        stats.decode('track', np.zeros(1), 0.0, key)
+    assert stats.redundant_decodes['track'] == 0
+
+
+def test_shared_decode_setups(tmp_path):
+    import shutil
+    import yaml
+    root = str(tmp_path / 'musdb')
+    shutil.copytree('data/MUS-STEMS-SAMPLE', root)
+    with open(os.path.join(musdb.__path__[0], 'configs', 'mus.yaml')) as f:
+        setup = yaml.safe_load(f)
+    del setup['sources']['other']
+    setup['targets'] = {'vocals': {'vocals': 1}}
+    with open(os.path.join(root, 'setup.yaml'), 'w') as f:
+        yaml.safe_dump(setup, f)
+
+    a = musdb.DB(root=root)
+    b = musdb.DB(root=root, setup_file='setup.yaml')
+    reference = b[0].sources['vocals'].read(0, 1.0)
+    # a decode of all stems of `a` is not reused for the stems of `b`
+    a[0].read_stems(0, 1.0)
+    assert np.allclose(b[0].targets['vocals'].read(0, 1.0), reference)
+    assert np.allclose(b[0].read_stems(0, 1.0)[-1], reference)
+
+    # whole tracks are not kept in the memo
+    stems = a[0].read_stems()
+    assert stems.flags.writeable
+    assert a[0].memo.get(a[0]._excerpt_key(0, None, None, None)) is None
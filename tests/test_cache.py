@@ -0,0 +1,136 @@
+import os
+import pytest
+import musdb
+import numpy as np
+
+
+@pytest.fixture(params=['float32', 'int16'])
+def cache_dtype(request):
+    return request.param
+
+
+def test_pcm_cache(tmp_path, cache_dtype):
+    mus = musdb.DB(root='data/MUS-STEMS-SAMPLE')
+    mus_cached = musdb.DB(
+        root='data/MUS-STEMS-SAMPLE',
+        cache_dir=str(tmp_path),
+        cache_dtype=cache_dtype
+    )
+    for track, cached_track in zip(mus, mus_cached):
+        assert np.allclose(cached_track.stems, track.stems, atol=1e-4)
+        assert np.allclose(cached_track.audio, track.audio, atol=1e-4)
+        path = mus_cached.pcm_cache.path(cached_track)
+        assert path.startswith(str(tmp_path / track.subset / track.name))
+        assert path.endswith('.%s.npy' % cache_dtype)
+        assert os.path.exists(path)
+
+        track.chunk_start = cached_track.chunk_start = 1.0
+        track.chunk_duration = cached_track.chunk_duration = 2.0
+        for name, target in track.targets.items():
+            assert np.allclose(
+                cached_track.targets[name].audio, target.audio, atol=1e-4
+            )
+
+
+def test_pcm_cache_setups(tmp_path):
+    import shutil
+    import yaml
+    root = str(tmp_path / 'musdb')
+    shutil.copytree('data/MUS-STEMS-SAMPLE', root)
+    with open(os.path.join(musdb.__path__[0], 'configs', 'mus.yaml')) as f:
+        setup = yaml.safe_load(f)
+    del setup['sources']['drums']
+    setup['targets'] = {'vocals': {'vocals': 1}}
+    with open(os.path.join(root, 'setup.yaml'), 'w') as f:
+        yaml.safe_dump(setup, f)
+
+    cache_dir = str(tmp_path / 'cache')
+    a = musdb.DB(root=root, cache_dir=cache_dir)
+    b = musdb.DB(root=root, cache_dir=cache_dir, setup_file='setup.yaml')
+    a[0].read_stems(0, 1.0)
+    # the stems of `a` are not read for the other setup of `b`
+    assert a.pcm_cache.path(a[0]) != b.pcm_cache.path(b[0])
+    stems = b[0].read_stems(0, 1.0)
+    assert stems.shape[0] == 1 + len(b[0].sources)
+    assert np.allclose(
+        b[0].sources['other'].read(0, 1.0),
+        musdb.DB(root=root, setup_file='setup.yaml')[0]
+        .sources['other'].read(0, 1.0),
+        atol=1e-4,
+    )
+
+
+def test_pcm_cache_dtypes(tmp_path):
+    mus_int16 = musdb.DB(
+        root='data/MUS-STEMS-SAMPLE', cache_dir=str(tmp_path),
+        cache_dtype='int16'
+    )
+    mus_int16[0].read_stems(0, 1.0)
+
+    # a float32 cache in the same folder does not read the int16 files
+    mus_float32 = musdb.DB(
+        root='data/MUS-STEMS-SAMPLE', cache_dir=str(tmp_path),
+        cache_dtype='float32'
+    )
+    audio = mus_float32[0].read(0, 1.0)
+    assert audio.dtype == np.float32
+    assert np.abs(audio).max() <= 1.0
+    assert np.allclose(audio, mus_int16[0].read(0, 1.0), atol=1e-4)
+
+    cache = musdb.AudioCache(max_bytes=2 * 800)
+    for k in range(3):
+        cache.put(k, np.zeros((100, 2), dtype=np.float32))
+    assert len(cache) == 2
+    assert cache.nbytes == 1600
+    assert cache.get(0) is None
+    assert cache.get(2) is not None
+    assert cache.hits == 1 and cache.misses == 1
+
+    # too large arrays are not cached
+    cache.put(3, np.zeros((1000, 2), dtype=np.float32))
+    assert cache.get(3) is None
+
+
+def test_memory_cache():
+    mus = musdb.DB(root='data/MUS-STEMS-SAMPLE')
+    mus_cached = musdb.DB(
+        root='data/MUS-STEMS-SAMPLE', memory_cache=2 ** 30, stats=True
+    )
+    track = mus[0]
+    cached_track = mus_cached[0]
+    # alternate between two excerpts, so that repeats are not served by
+    # the last decoded excerpt
+    for _ in range(2):
+        for start in [0.0, 2.0]:
+            assert np.allclose(
+                cached_track.read(start, 1.0), track.read(start, 1.0)
+            )
+            assert np.allclose(
+                cached_track.targets['vocals'].read(start, 1.0),
+                track.targets['vocals'].read(start, 1.0)
+            )
+            assert np.allclose(
+                cached_track.targets['accompaniment'].read(start, 1.0),
+                track.targets['accompaniment'].read(start, 1.0)
+            )
+
+    # each excerpt is decoded and cached once, as one stems tensor
+    assert len(mus_cached.audio_cache) == 2
+    assert mus_cached.stats.decodes == 2
+    assert mus_cached.audio_cache.hits > 0
+    assert mus_cached.stats.hits['memory'] == mus_cached.audio_cache.hits
+
+
+def test_pcm_cache_sample_rate(tmp_path):
+    mus = musdb.DB(root='data/MUS-STEMS-SAMPLE', sample_rate=16000)
+    mus_cached = musdb.DB(
+        root='data/MUS-STEMS-SAMPLE', sample_rate=16000, cache_dir=str(tmp_path)
+    )
+    for track, cached_track in zip(mus, mus_cached):
+        cached_track.chunk_duration = track.chunk_duration = 1.0
+        cached_track.chunk_start = track.chunk_start = 1.0
+        assert cached_track.stems.shape[1] == 16000
+        assert np.allclose(cached_track.stems, track.stems, atol=1e-2)
+        assert (
+            tmp_path / track.subset / (track.name + '.float32.16000Hz.npy')
+        ).exists()
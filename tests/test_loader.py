@@ -0,0 +1,31 @@
+import pytest
+import musdb
+import numpy as np
+
+
+@pytest.fixture(params=[True, False])
+def ordered(request):
+    return request.param
+
+
+def test_loader(ordered):
+    mus = musdb.DB(root='data/MUS-STEMS-SAMPLE')
+    with musdb.Loader(mus, workers=2, prefetch=3, ordered=ordered) as loader:
+        assert len(loader) == len(mus)
+        results = list(loader)
+
+    assert len(results) == len(mus)
+    if ordered:
+        assert [track.name for track, _ in results] == \
+            [track.name for track in mus]
+
+    for track, stems in results:
+        assert np.allclose(stems, track.stems)
+
+
+def test_loader_early_stop():
+    mus = musdb.DB(root='data/MUS-STEMS-SAMPLE')
+    with musdb.Loader(mus, fn=lambda t: t.name, workers=2) as loader:
+        for name in loader:
+            break
+    assert name == mus[0].name
@@ -1,8 +1,10 @@
 import os
+import shutil
 import pytest
 import musdb
 import numpy as np
 import yaml
+import stempeg
 
 
 @pytest.fixture(params=['train', 'test', ['train', 'test'], None])
@@ -58,6 +60,116 @@ def test_file_loading(mus, subset):
         assert len(mus) == 2
 
 
+def test_metadata_index(tmp_path):
+    root = str(tmp_path / 'musdb')
+    shutil.copytree('data/MUS-STEMS-SAMPLE', root)
+    mus = musdb.DB(root=root, index=True)
+    assert os.path.exists(os.path.join(root, '.musdb_index.json'))
+
+    mus_indexed = musdb.DB(root=root, index=True)
+    for track, indexed_track in zip(mus, mus_indexed):
+        assert indexed_track.samples == track.samples
+        assert indexed_track.rate == track.rate
+        assert indexed_track.duration == track.duration
+        assert np.allclose(indexed_track.audio, track.audio)
+
+
+def test_lazy_metadata(monkeypatch):
+    probed = []
+    info = musdb.audio_classes.stempeg.Info
+
+    def probe(path):
+        probed.append(path)
+        return info(path)
+
+    monkeypatch.setattr(musdb.audio_classes.stempeg, 'Info', probe)
+    mus = musdb.DB(root='data/MUS-STEMS-SAMPLE')
+    assert not probed
+
+    assert mus[0].duration > 0
+    assert mus[0].samples > 0
+    assert len(probed) == 1
+
+
+def test_sample_excerpts(mus):
+    excerpts = list(
+        mus.sample_excerpts(1.0, n=3, targets=['vocals', 'accompaniment'], seed=42)
+    )
+    assert len(excerpts) == 3
+    for mixture, targets in excerpts:
+        assert np.allclose(mixture.shape[0], 44100)
+        assert targets.shape == (2,) + mixture.shape
+
+    # excerpts are reproducible
+    mixture, targets = next(mus.sample_excerpts(1.0, seed=42))
+    assert np.allclose(mixture, excerpts[0][0])
+
+
+def test_get_batch(mus):
+    requests = [(0, 0.5, 1.0), (len(mus) - 1, 2.0, 1.0), (0, 3.0, 1.0)]
+    batch = mus.get_batch(requests)
+    assert batch.shape == (3, 5, 44100, 2)
+    for excerpt, (track_idx, start, duration) in zip(batch, requests):
+        stems = mus[track_idx].read_stems(start, duration)
+        assert np.allclose(excerpt, stems, atol=1e-4)
+
+    targets = ['vocals', 'accompaniment']
+    batch = mus.get_batch(requests, targets=targets, dtype='float32')
+    assert batch.shape == (3, 3, 44100, 2)
+    assert batch.dtype == np.float32
+    for excerpt, (track_idx, start, duration) in zip(batch, requests):
+        track = mus[track_idx]
+        assert np.allclose(excerpt[0], track.read(start, duration), atol=1e-4)
+        for k, name in enumerate(targets, 1):
+            assert np.allclose(
+                excerpt[k], track.targets[name].read(start, duration), atol=1e-4
+            )
+
+    # the batch array can be reused
+    assert mus.get_batch(requests, targets, 'float32', out=batch) is batch
+
+    with pytest.raises(ValueError):
+        mus.get_batch([(0, 0.0, 1.0), (0, 0.0, 2.0)])
+
+
+def test_get_batch_spans(mus):
+    # close excerpts share a decode, distant ones are decoded separately
+    excerpts = [(0, 6.0, 1.0), (1, 0.5, 1.0), (2, 0.0, 1.0), (3, 2.0, 1.0)]
+    assert musdb._merge_excerpts(excerpts) == [
+        [(2, 0.0, 1.0), (1, 0.5, 1.0), (3, 2.0, 1.0)],
+        [(0, 6.0, 1.0)],
+    ]
+
+    requests = [(0, 5.0, 1.0), (0, 0.0, 1.0), (0, 0.5, 1.0)]
+    batch = mus.get_batch(requests)
+    for excerpt, (track_idx, start, duration) in zip(batch, requests):
+        stems = mus[track_idx].read_stems(start, duration)
+        assert np.allclose(excerpt, stems, atol=1e-4)
+
+
+def test_sample_active_excerpts(tmp_path):
+    root = str(tmp_path / 'musdb')
+    shutil.copytree('data/MUS-STEMS-SAMPLE', root)
+    mus = musdb.DB(root=root, index=True)
+    mus.load_envelopes()
+    assert os.path.exists(os.path.join(root, '.musdb_envelopes.npz'))
+    for track in mus:
+        envelope = track.envelopes[0.1]
+        assert envelope.shape == (5, track.samples // 4410)
+
+    # envelopes are loaded from the index without decoding
+    mus_indexed = musdb.DB(root=root, index=True, stats=True)
+    mus_indexed.load_envelopes()
+    assert mus_indexed.stats.decodes == 0
+
+    threshold = -40
+    for _, targets in mus_indexed.sample_excerpts(
+        1.0, n=5, targets=['vocals'], seed=42, silence_threshold=threshold
+    ):
+        power = np.mean(targets[0] ** 2)
+        assert 10 * np.log10(power) > threshold - 3
+
+
 def test_audio_regression():
     """test audio loading capabilities"""
     mus = musdb.DB(download=True)
@@ -91,3 +203,81 @@ def test_download_and_validation():
 
     with pytest.raises(RuntimeError):
         mus_train = musdb.DB(download=True, split='train')
+
+
+def test_save_estimates(tmp_path):
+    mus = musdb.DB(root='data/MUS-STEMS-SAMPLE', subsets='test')
+    track = mus[0]
+    track.chunk_duration = 1.0
+    estimates = {
+        'vocals': track.targets['vocals'].audio,
+        'accompaniment': track.targets['accompaniment'].audio,
+    }
+
+    mus.save_estimates(estimates, track, str(tmp_path))
+    for name in estimates:
+        assert (tmp_path / 'test' / track.name / (name + '.wav')).exists()
+
+    mus.save_estimates(estimates, track, str(tmp_path), write_stems=True)
+    stem_path = tmp_path / 'test' / (track.name + '.stem.mp4')
+    assert stem_path.exists()
+    info = stempeg.Info(str(stem_path))
+    assert info.nb_audio_streams == 2
+
+    # int16 estimates are encoded without rescaling
+    vocals = track.targets['vocals'].read(0, 1.0, dtype='int16')
+    mus.save_estimates(
+        {'vocals': vocals}, track, str(tmp_path / 'int16'), write_stems=True
+    )
+    decoded = musdb.decode.read_streams(
+        [(str(tmp_path / 'int16' / 'test' / (track.name + '.stem.mp4')), 0)],
+        channels=2,
+    )[0]
+    reference = musdb.decode.to_dtype(vocals, np.float64)
+    assert np.isclose(
+        np.sqrt(np.mean(decoded ** 2)), np.sqrt(np.mean(reference ** 2)),
+        rtol=0.2,
+    )
+
+
+def test_estimates_writer(tmp_path):
+    mus = musdb.DB(root='data/MUS-STEMS-SAMPLE', subsets='test')
+    with musdb.EstimatesWriter(str(tmp_path), workers=2, max_pending=1) as w:
+        for track in mus:
+            track.chunk_duration = 1.0
+            w.write(track, {'vocals': track.targets['vocals'].audio})
+
+    for track in mus:
+        assert (tmp_path / 'test' / track.name / 'vocals.wav').exists()
+
+
+def test_filter():
+    mus = musdb.DB(root='data/MUS-STEMS-SAMPLE')
+    name = mus[0].name
+    assert mus.get_track_indices_by_names(name) == [0]
+    with pytest.raises(ValueError):
+        mus.get_track_indices_by_names('unknown track')
+
+    test = mus.filter(subsets='test')
+    assert len(test) == len([t for t in mus if t.subset == 'test'])
+    assert all(track.subset == 'test' for track in test)
+
+    artist = test[0].artist
+    view = test.filter(artists=artist, sources=['vocals'], min_duration=1.0)
+    assert all(track.artist == artist for track in view)
+    assert view[0] is test[0]
+    assert len(view[:1]) == 1
+    assert view.get_track_indices_by_names(view[0].name) == [0]
+    assert len(mus.filter(min_duration=10000)) == 0
+
+    # other attributes are those of the DB
+    assert view.root == mus.root and view.is_wav == mus.is_wav
+    assert view.sources_names == mus.sources_names
+    assert view.save_estimates == mus.save_estimates
+
+
+def test_load_timings():
+    mus = musdb.DB(root='data/MUS-STEMS-SAMPLE', index=False)
+    assert list(mus.load_timings) == ['setup', 'scan', 'metadata', 'tracks']
+    assert all(t >= 0 for t in mus.load_timings.values())
+    assert musdb.DB(root='data/does-not-exist').tracks == []
@@ -0,0 +1,52 @@
+import pytest
+import musdb
+import numpy as np
+
+
+def test_remixer():
+    mus = musdb.DB(root='data/MUS-STEMS-SAMPLE')
+    remixer = musdb.Remixer(
+        mus, duration=1.0, targets=['vocals', 'accompaniment'], seed=42
+    )
+    mixture, targets = remixer.sample(batch_size=3)
+    assert mixture.shape == (3, 44100, 2)
+    assert targets.shape == (3, 2, 44100, 2)
+    # vocals and accompaniment add up to the remixed mixture
+    assert np.allclose(targets.sum(axis=1), mixture)
+
+    batches = list(remixer.batches(batch_size=2, n=2))
+    assert len(batches) == 2
+
+
+def test_remixer_identity():
+    mus = musdb.DB(root='data/MUS-STEMS-SAMPLE', subsets='train')
+    remixer = musdb.Remixer(
+        mus, duration=1.0, gain=(1, 1), flip_polarity=0, swap_channels=0,
+        dtype='float32',
+    )
+    mixture, targets = remixer.sample()
+    assert mixture.dtype == np.float32
+    names = remixer.targets
+    # without augmentation, `linear_mixture` is the sum of all sources
+    assert np.allclose(
+        targets[0, names.index('linear_mixture')], mixture[0], atol=1e-5
+    )
+
+    with pytest.raises(ValueError):
+        musdb.Remixer(mus, duration=1.0, dtype='int16')
+
+
+@pytest.mark.parametrize('memory_cache', [None, 2 ** 30])
+def test_remixer_decodes_sources(memory_cache):
+    mus = musdb.DB(
+        root='data/MUS-STEMS-SAMPLE', stats=True, memory_cache=memory_cache
+    )
+    remixer = musdb.Remixer(mus, duration=1.0, seed=42)
+    remixer.sample()
+    summary = mus.stats.summary()
+    # only the stream of each source is decoded, not all stems
+    assert summary['decodes'] == len(remixer.sources)
+    assert summary['decoded_bytes'] < 2 * len(remixer.sources) * 44100 * 2 * 8
+    # random excerpts do not evict cached excerpts
+    if memory_cache is not None:
+        assert len(mus.audio_cache) == 0
@@ -0,0 +1,95 @@
+import os
+import pytest
+import musdb
+import numpy as np
+from musdb import tools
+
+
+@pytest.fixture(params=[1, 2])
+def workers(request):
+    return request.param
+
+
+def test_musdb_convert(tmp_path, workers):
+    output_root = str(tmp_path)
+    tools.musdb_convert(
+        ['data/MUS-STEMS-SAMPLE', output_root, '--workers', str(workers)]
+    )
+
+    mus = musdb.DB(root='data/MUS-STEMS-SAMPLE')
+    mus_wav = musdb.DB(root=output_root, is_wav=True)
+    assert len(mus_wav) == len(mus)
+    for track, wav_track in zip(mus, mus_wav):
+        assert os.path.exists(
+            os.path.join(
+                output_root, track.subset, track.name, tools.COMPLETE_MARKER
+            )
+        )
+        assert np.allclose(wav_track.audio, track.audio, atol=1e-3)
+
+    # converted tracks are skipped
+    mixture = os.path.join(
+        output_root, mus[0].subset, mus[0].name, 'mixture.wav'
+    )
+    mtime = os.path.getmtime(mixture)
+    tools.musdb_convert(['data/MUS-STEMS-SAMPLE', output_root])
+    assert os.path.getmtime(mixture) == mtime
+
+
+def test_musdb_bench(tmp_path):
+    from musdb import benchmark
+    output = str(tmp_path / 'results.json')
+    report = benchmark.musdb_bench(
+        ['data/MUS-STEMS-SAMPLE', '--workers', '1', '2',
+         '--excerpts', '4', '--output', output]
+    )
+    assert os.path.exists(output)
+    benchmarks = set(result['benchmark'] for result in report['results'])
+    assert benchmarks == set([
+        'construction', 'mixing', 'full_tracks', 'excerpts',
+        'save_estimates', 'save_estimates_stems'
+    ])
+    assert set(result['mode'] for result in report['results']) == \
+        set(['stem', 'wav'])
+
+
+def test_musdb_convert_sample_rate(tmp_path):
+    output_root = str(tmp_path)
+    tools.musdb_convert(
+        ['data/MUS-STEMS-SAMPLE', output_root, '--sample-rate', '16000']
+    )
+    mus_wav = musdb.DB(root=output_root, is_wav=True)
+    for track in mus_wav:
+        assert track.rate == 16000
+
+    # converting at another rate does not skip the converted tracks
+    tools.musdb_convert(
+        ['data/MUS-STEMS-SAMPLE', output_root, '--sample-rate', '22050']
+    )
+    mus_wav = musdb.DB(root=output_root, is_wav=True)
+    for track in mus_wav:
+        assert track.rate == 22050
+
+
+def test_musdb_convert_shards(tmp_path):
+    output_root = str(tmp_path)
+    tools.musdb_convert(
+        ['data/MUS-STEMS-SAMPLE', output_root, '--format', 'shards',
+         '--shard-size', '1', '--workers', '2']
+    )
+    assert (tmp_path / 'shards.json').exists()
+
+    mus = musdb.DB(root='data/MUS-STEMS-SAMPLE')
+    mus_shards = musdb.DB(root=output_root, format='shards')
+    assert [t.name for t in mus_shards] == [t.name for t in mus]
+    for track, shard_track in zip(mus, mus_shards):
+        assert shard_track.rate == track.rate
+        assert np.allclose(shard_track.stems, track.stems, atol=1e-4)
+        assert np.allclose(
+            shard_track.targets['vocals'].read(1.0, 2.0),
+            track.targets['vocals'].read(1.0, 2.0),
+            atol=1e-4
+        )
+
+    with pytest.raises(ValueError):
+        musdb.DB(root=output_root, format='shards', sample_rate=16000)